@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from risk_analyzer import MODEL_NAME, PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE, PROMPT_VERSION
+
+DEFAULT_CACHE_PATH = os.environ.get("CONTRACT_CACHE_PATH", os.path.join(".cache", "analysis_cache.sqlite3"))
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_AGE_DAYS = 180
+EVICT_EVERY_PUTS = 1000
+
+def normalize_clause(text):
+    """Collapses PDF/DOCX whitespace noise so identical clauses hash identically."""
+    return " ".join(text.split())
+
+def prompt_fingerprint():
+    """Identifies the prompts in use: the manual version plus a hash of the templates,
+    so an edited template invalidates old entries even if nobody bumps the version."""
+    templates = PROMPT_TEMPLATE + BATCH_PROMPT_TEMPLATE
+    digest = hashlib.sha256(templates.encode("utf-8")).hexdigest()[:12]
+    return f"v{PROMPT_VERSION}-{digest}"
+
+def cache_key(clause, language="English", model_name=MODEL_NAME, prompt_version=None):
+    """Content address of one analysis: normalized clause, language, model and prompt."""
+    prompt_version = prompt_version or prompt_fingerprint()
+    payload = "\x1f".join([normalize_clause(clause), language, model_name, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class AnalysisCache:
+    """
+    On-disk (SQLite) cache of clause risk analyses, shared by all threads.
+    Only successful analyses are stored; failed ones are always retried.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS, model_name=MODEL_NAME):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.model_name = model_name
+        self.prompt_version = prompt_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Batch runs share the file across processes, so wait for their locks
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    key TEXT PRIMARY KEY,
+                    prompt_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON analyses (last_used)")
+            # Free-form text results (partial summaries) under caller-built keys
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS texts (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+        self.invalidate()
+        self.evict()
+
+    def _key(self, clause, language):
+        return cache_key(clause, language, self.model_name, self.prompt_version)
+
+    def get(self, clause, language="English"):
+        """Returns the cached analysis for a clause, or None on a miss."""
+        key = self._key(clause, language)
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, clause, result, language="English"):
+        """Stores a successful analysis (only the model's own fields are kept)."""
+        stored = {k: result[k] for k in ("risk", "explanation", "suggestion") if k in result}
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)",
+                (self._key(clause, language), self.prompt_version,
+                 json.dumps(stored, ensure_ascii=False), now, now))
+            self._puts += 1
+        # Keep the file bounded in long-running processes, not just at startup
+        if self._puts % EVICT_EVERY_PUTS == 0:
+            self.evict()
+
+    def get_text(self, key):
+        """Returns a stored text result (see put_text), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM texts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE texts SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put_text(self, key, value):
+        """Stores a text result; the key must already cover the model and prompt that made it."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?)", (key, value, now, now))
+
+    def invalidate(self, everything=False):
+        """Drops entries written with another prompt version (or all entries)."""
+        with self._lock, self._conn:
+            if everything:
+                self._conn.execute("DELETE FROM texts")
+                cur = self._conn.execute("DELETE FROM analyses")
+            else:
+                cur = self._conn.execute("DELETE FROM analyses WHERE prompt_version != ?",
+                                         (self.prompt_version,))
+        return cur.rowcount
+
+    def evict(self):
+        """Applies the age limit, then trims least recently used entries over max_entries."""
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM analyses WHERE last_used < ?", (cutoff,)).rowcount
+            removed += self._conn.execute("DELETE FROM texts WHERE last_used < ?", (cutoff,)).rowcount
+            removed += self._conn.execute("""
+                DELETE FROM analyses WHERE key IN (
+                    SELECT key FROM analyses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""", (self.max_entries,)).rowcount
+        return removed
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+def get_cache():
+    """Process-wide cache instance, so all Streamlit sessions share one connection."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = AnalysisCache()
+        return _shared_cache
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Maintain the clause analysis cache.")
+    arg_parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    arg_parser.add_argument("--clear", action="store_true", help="delete every cached analysis")
+    args = arg_parser.parse_args()
+
+    cache = AnalysisCache(args.path)
+    if args.clear:
+        print(f"Removed {cache.invalidate(everything=True)} entries")
+    print(cache.stats())
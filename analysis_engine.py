@@ -0,0 +1,247 @@
+import contextvars
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache, partial
+
+from risk_analyzer import request_analysis, request_batch_analysis, failed_result, FAILED
+from instrumentation import count
+
+# Defaults tuned for the Gemini free/standard tiers; override per call
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 60       # seconds per Gemini call
+DEFAULT_RETRIES = 3        # extra attempts after the first one
+DEFAULT_BACKOFF = 1.0      # seconds, doubled on every retry
+
+# Batched mode: clause text packed into one request, in estimated tokens
+DEFAULT_BATCH_TOKENS = 2000
+MAX_BATCH_CLAUSES = 20     # keeps the JSON reply well inside the output limit
+
+# Seconds between partial-explanation updates while replies stream in
+PARTIAL_INTERVAL = 0.25
+
+@lru_cache(maxsize=None)
+def transient_errors():
+    """Errors worth retrying: rate limits, overloaded servers and network hiccups."""
+    # google.api_core is slow to import, so it loads with the first failed call
+    from google.api_core import exceptions as api_exceptions
+    return (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.DeadlineExceeded,
+        TimeoutError,
+        ConnectionError,
+    )
+
+def is_transient(error):
+    """True if a failed call may succeed when retried."""
+    return isinstance(error, transient_errors())
+
+def call_with_retries(call, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """Runs call(), retrying transient errors with exponential backoff; re-raises the last error."""
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                count("llm_errors")
+                raise
+            count("llm_retries")
+            # Full jitter keeps parallel workers from retrying in lockstep
+            time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+def analyze_with_retries(clause, language="English", timeout=DEFAULT_TIMEOUT,
+                         retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, on_partial=None):
+    """
+    Analyzes one clause, retrying transient errors with exponential backoff.
+    Returns a FAILED result once the retries are used up or on a permanent error.
+    on_partial streams the reply (see risk_analyzer.request_analysis).
+    """
+    try:
+        return call_with_retries(lambda: request_analysis(clause, language, timeout=timeout, on_partial=on_partial),
+                                 retries, backoff)
+    except Exception as e:
+        count("failed_clauses")
+        return failed_result(e)
+
+def analyze_batch_with_retries(batch, language="English", timeout=DEFAULT_TIMEOUT,
+                               retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """
+    Analyzes a batch of (index, clause) pairs in one request.
+    Returns {index: result} for the clauses answered; an unusable reply answers none.
+    """
+    try:
+        return call_with_retries(lambda: request_batch_analysis(batch, language, timeout=timeout),
+                                 retries, backoff)
+    except Exception:
+        return {}
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used for packing batches."""
+    return len(text) // 4 + 1
+
+def pack_batches(items, token_budget=DEFAULT_BATCH_TOKENS, max_clauses=MAX_BATCH_CLAUSES):
+    """
+    Greedily packs (index, clause) pairs, in order, into batches whose estimated
+    clause tokens stay within token_budget. Oversized clauses get a batch of their own.
+    Works lazily, so items may be a stream of clauses that is still being parsed.
+    """
+    current, used = [], 0
+    for index, clause in items:
+        tokens = estimate_tokens(clause)
+        if current and (used + tokens > token_budget or len(current) >= max_clauses):
+            yield current
+            current, used = [], 0
+        current.append((index, clause))
+        used += tokens
+    if current:
+        yield current
+
+def iter_analyses(clauses, language="English", workers=DEFAULT_WORKERS,
+                  timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                  backoff=DEFAULT_BACKOFF, cache=None, batch_tokens=None, prescreen=None,
+                  similar=None, previous=None, on_partial=None):
+    """
+    Analyzes clauses concurrently, yielding (index, clause, result) as each one
+    finishes (not in clause order). clauses may be a lazy iterator: clauses are
+    submitted as they are produced and finished results are yielded in between.
+
+    With on_partial, single-clause replies are streamed, and
+    on_partial(index, explanation) is called from the calling thread, at most
+    every PARTIAL_INTERVAL seconds, with the explanation received so far for
+    clauses still in flight.
+
+    With a revisions.PreviousVersion, clauses unchanged since that version keep
+    its analysis (marked source="previous"), before anything else is tried.
+    With a Prescreen, clauses without any risk signal get a local Low result
+    (marked source="prescreen"). With an AnalysisCache, previously seen clauses
+    are answered without an API call (marked source="cache") and new successful
+    results are stored. With a SimilarityIndex, near-duplicates of indexed
+    clauses reuse that clause's analysis (marked source="similar") and new
+    successful results are indexed. With batch_tokens, short clauses are packed into shared
+    requests of about that many clause tokens; clauses a batch reply leaves out
+    are retried alone.
+    """
+    ready = deque()  # finished (index, clause, result) waiting to be yielded
+    streamed = {}    # index -> explanation received so far, written by the workers
+    shown = {}       # index -> the explanation last passed to on_partial
+
+    def report_partials():
+        for i, explanation in list(streamed.items()):
+            if shown.get(i) != explanation:
+                shown[i] = explanation
+                on_partial(i, explanation)
+
+    def uncached():
+        for i, clause in enumerate(clauses):
+            count("clauses")
+            carried = previous.lookup(clause, language) if previous else None
+            if carried:
+                count("carried_forward")
+                ready.append((i, clause, carried))
+                continue
+            local = prescreen.screen(clause) if prescreen else None
+            if local:
+                count("prescreened")
+                ready.append((i, clause, local))
+                continue
+            cached = cache.get(clause, language) if cache else None
+            if cached:
+                count("cache_hits")
+                cached["source"] = "cache"
+                ready.append((i, clause, cached))
+                continue
+            reused = similar.lookup(clause, language) if similar else None
+            if reused:
+                count("similar_reused")
+                ready.append((i, clause, reused))
+            else:
+                yield i, clause
+
+    def drain():
+        while ready:
+            i, clause, result = ready.popleft()
+            streamed.pop(i, None)
+            shown.pop(i, None)
+            # Only fresh model answers are stored, not reused or local results
+            if result["risk"] != FAILED and "source" not in result:
+                if cache:
+                    cache.put(clause, result, language)
+                if similar:
+                    similar.add(clause, result, language)
+            yield i, clause, result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # Maps each future to the (index, clause) pairs it answers
+        futures = {}
+
+        def submit(job):
+            # Workers run in a copy of this context, so their spans count towards the current audit
+            context = contextvars.copy_context()
+            if len(job) == 1:
+                i, clause = job[0]
+                future = pool.submit(context.run, analyze_with_retries, clause, language, timeout, retries, backoff,
+                                     partial(streamed.__setitem__, i) if on_partial else None)
+            else:
+                future = pool.submit(context.run, analyze_batch_with_retries, job, language, timeout, retries,
+                                     backoff)
+            futures[future] = job
+
+        def collect(done):
+            for future in done:
+                job = futures.pop(future)
+                if len(job) == 1:
+                    ready.append((*job[0], future.result()))
+                    continue
+                answered = future.result()
+                for i, clause in job:
+                    if i in answered:
+                        ready.append((i, clause, answered[i]))
+                    else:
+                        # Left out of the batch reply: fall back to a request of its own
+                        count("batch_fallbacks")
+                        submit([(i, clause)])
+
+        if batch_tokens:
+            jobs = pack_batches(uncached(), batch_tokens)
+        else:
+            jobs = ([item] for item in uncached())
+
+        for job in jobs:
+            submit(job)
+            collect([future for future in futures if future.done()])
+            if on_partial:
+                report_partials()
+            yield from drain()
+        yield from drain()
+
+        while futures:
+            done, _ = wait(futures, timeout=PARTIAL_INTERVAL if on_partial else None, return_when=FIRST_COMPLETED)
+            if on_partial:
+                report_partials()
+            collect(done)
+            yield from drain()
+
+def analyze_clauses(clauses, language="English", workers=DEFAULT_WORKERS,
+                    timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                    backoff=DEFAULT_BACKOFF, on_result=None, cache=None,
+                    batch_tokens=None, prescreen=None, similar=None, previous=None, on_partial=None):
+    """
+    Analyzes a list of clauses concurrently and returns the results in clause order.
+
+    on_result(index, result, completed) is called from the calling thread as
+    each clause finishes, so it is safe to update Streamlit widgets from it.
+    See iter_analyses() for revisions, pre-screening, caching, similar-clause reuse,
+    batching and streamed partial explanations.
+    """
+    results = [None] * len(clauses)
+    analyses = iter_analyses(clauses, language, workers, timeout, retries, backoff, cache,
+                             batch_tokens, prescreen, similar, previous, on_partial)
+    for completed, (i, _, result) in enumerate(analyses, start=1):
+        results[i] = result
+        if on_result:
+            on_result(i, result, completed)
+    return results
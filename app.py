@@ -1,35 +1,30 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import requests
 import json
-from streamlit_lottie import st_lottie
-from parser import extract_text
-from clause_splitter import split_clauses
-from risk_analyzer import analyze_clause
-from report_generator import generate_pdf_report, generate_txt_report
-from hindi_fixer import kruti_to_unicode
+import hashlib
+import time
+import uuid
+from risk_analyzer import FAILED
+from analysis_engine import DEFAULT_WORKERS, DEFAULT_BATCH_TOKENS
+from pipeline import iter_document_results, empty_risk_counts, overall_status
+from analysis_cache import get_cache
+from prescreen import get_prescreen
+from audit_log import get_audit_log, audit_record, start_of_month
+import instrumentation
+from instrumentation import METRICS, recording, stage_summary
+from result_store import document_key, get_store, result_size
+from quota_scheduler import get_scheduler, quota_session
+from lottie_assets import load_lottie
 
 # --- Page Config ---
 st.set_page_config(page_title="Contract Insight AI", layout="wide", page_icon="⚖️")
 
-# --- Animation Loader (With Error Handling) ---
-def load_lottieurl(url):
-    try:
-        r = requests.get(url, timeout=5)
-        if r.status_code != 200:
-            return None
-        return r.json()
-    except Exception:
-        return None
-
-# UPDATED 3D ANIMATION LINKS
-# 1. 3D Legal Scale Character
-lottie_main_char = load_lottieurl("https://lottie.host/82823654-e403-4c91-9e73-982d1c60a87a/7xYpX4mQ6J.json")
-# 2. 3D Security Shield
-lottie_risk = load_lottieurl("https://lottie.host/41993780-0015-4405-8731-182066376635/pY1G4d8d7a.json")
-# 3. 3D Global Language
-lottie_hindi = load_lottieurl("https://lottie.host/98685764-8834-4576-8767-664854344847/g444544555.json")
+# Every browser session shares the server's Gemini quota fairly with the others
+session_id = st.session_state.setdefault("quota_session", uuid.uuid4().hex)
+
+# --- Animations (bundled or cached on disk; None until available) ---
+lottie_main_char = load_lottie("main_char")
+lottie_risk = load_lottie("risk")
+lottie_hindi = load_lottie("hindi")
 
 # --- Premium Glassmorphism CSS ---
 st.markdown("""
@@ -97,11 +92,46 @@ with st.sidebar:
     uploaded_file = st.file_uploader("📂 Drop Contract File", type=["pdf", "docx", "txt"])
     st.divider()
     use_legacy_fix = st.checkbox("🛠️ Legacy Hindi Fix", help="Use if text looks like 'Hkkxhnkjh'")
+    workers = st.slider("⚡ Parallel AI Requests", 1, 16, DEFAULT_WORKERS,
+                        help="How many clauses are analyzed at the same time")
+    use_batching = st.checkbox("📦 Batch Short Clauses", value=True,
+                               help="Send several short clauses per AI request to save quota")
+    use_prescreen = st.checkbox("🧹 Skip Boilerplate Locally", value=True,
+                                help="Signature, witness and definition clauses with no risk terms "
+                                     "are marked Low without an AI call")
+    use_similar = st.checkbox("🧬 Reuse Similar Clauses", value=True,
+                              help="Clauses that differ from an earlier analyzed clause only in names, "
+                                   "dates or amounts reuse its analysis")
+    use_revisions = st.checkbox("📑 Revision Mode",
+                                help="Treat each upload as a new version of the previous one: unchanged clauses "
+                                     "keep their analysis and the dashboard lists the risk changes")
+    # Applies to this session's audits only; CONTRACT_METRICS=0 turns metrics off for the server
+    collect_metrics = st.checkbox("⏱️ Collect Performance Metrics", value=instrumentation.enabled(),
+                                  disabled=not instrumentation.enabled(),
+                                  help="Time every stage and count AI calls, retries and cache hits")
+    st.divider()
+    with st.expander("📜 Audit History"):
+        audit_log = get_audit_log()
+        this_month = start_of_month()
+        p95_seconds = audit_log.latency_percentile(95, since=this_month)
+        st.metric("Critical contracts this month", audit_log.count("CRITICAL", since=this_month))
+        st.metric("p95 analysis time", f"{p95_seconds:.1f} s" if p95_seconds is not None else "—")
+        dropped = audit_log.stats()["dropped"]
+        if dropped:
+            st.warning(f"{dropped} audits since server start could not be written to the history (see the server log)")
+        recent = audit_log.query(limit=10)
+        # The table needs pandas, so it is only built on request
+        if recent and st.toggle("Show recent audits"):
+            import pandas as pd
+            st.dataframe(pd.DataFrame(recent, columns=["time", "file", "overall_risk", "clause_count", "seconds"]),
+                         hide_index=True)
     
 
 # --- Main Page UI ---
 if not uploaded_file:
     # --- UPGRADED 3D HOME PAGE ---
+    if lottie_main_char or lottie_risk or lottie_hindi:
+        from streamlit_lottie import st_lottie
     col_left, col_right = st.columns([1.2, 1])
     
     with col_left:
@@ -119,7 +149,9 @@ if not uploaded_file:
             st_lottie(lottie_main_char, height=450, key="main_hero")
         else:
             # High-end fallback image if Lottie fails
-            st.image("https://cdn-icons-png.flaticon.com/512/2621/2621040.png", width=350)
+            # A plain <img>: st.image would load numpy and PIL just to pass a URL through
+            st.markdown('<img src="https://cdn-icons-png.flaticon.com/512/2621/2621040.png" width="350">',
+                        unsafe_allow_html=True)
 
     st.divider()
 
@@ -143,39 +175,125 @@ if not uploaded_file:
     with f3:
         st.markdown('<div class="feature-card">', unsafe_allow_html=True)
         # Use a high-quality static icon as a secondary character if lottie fails
-        st.image("https://cdn-icons-png.flaticon.com/512/3222/3222642.png", width=120)
+        st.markdown('<img src="https://cdn-icons-png.flaticon.com/512/3222/3222642.png" width="120">',
+                    unsafe_allow_html=True)
         st.markdown("<h3 style='color:#f1c40f'>Deep Audit</h3>", unsafe_allow_html=True)
         st.write("Summarizes complex legal jargon into plain language.")
         st.markdown('</div>', unsafe_allow_html=True)
 
 else:
     # --- ANALYSIS WORKFLOW ---
-    with st.spinner("🕵️ AI Character is scanning your contract..."):
-        raw_text = extract_text(uploaded_file)
-        text = kruti_to_unicode(raw_text) if use_legacy_fix else raw_text
-        
-        if not text:
+    # Heavy libraries load with the first upload, not with the landing page
+    import pandas as pd
+    import plotly.express as px
+    from similarity_index import get_similarity_index
+    from report_generator import generate_pdf_report, generate_txt_report, clause_citation, missing_font_error
+    from summarizer import summarize_clauses
+    from revisions import PreviousVersion, risk_changes, describe_change, risk_direction, MODIFIED, NEW, REMOVED, UNCHANGED
+
+    # Streamlit reruns this script on every click, so finished results are kept
+    # per session and per process, keyed by file content and the legacy-fix flag
+    doc_key = document_key(uploaded_file.getvalue(), use_legacy_fix)
+    store = get_store()
+    session_entry = st.session_state.get("audit_result")
+    if session_entry and session_entry[0] == doc_key:
+        result = session_entry[1]
+    else:
+        # A different document: the one shown until now is the previous version in revision mode
+        if session_entry:
+            st.session_state["previous_version"] = session_entry
+        result = store.get(doc_key)
+        if result is not None:
+            # Shown from the store: this is now the session's document, so the next
+            # rerun does not take it for a new upload and make it its own previous version
+            st.session_state["audit_result"] = (doc_key, result)
+    previous_entry = st.session_state.get("previous_version") if use_revisions else None
+    if previous_entry and previous_entry[0] == doc_key:
+        previous_entry = None
+
+    if result is None:
+        # Pages are parsed, split and analyzed as a stream, and each clause is
+        # shown as soon as its analysis is back
+        live = st.empty()
+        with live.container():
+            st.markdown("### 🕵️ AI Character is scanning your contract...")
+            live_status = st.empty()
+            live_metrics = st.empty()
+            live_feed = st.container()
+
+        risk_counts = empty_risk_counts()
+        analysis_by_index = {}
+        # One slot per clause in the live feed: its streamed explanation, then its result
+        feed_slots = {}
+
+        def show_partial(row, explanation):
+            slot = feed_slots.setdefault(row['id'], live_feed.empty())
+            with slot.container():
+                with st.expander(f"{clause_citation(row)} — analyzing...", expanded=True):
+                    st.write(f"**AI Analysis:** {explanation}▌")
+
+        started = time.perf_counter()
+        first_result_seconds = None
+        analyses = iter_document_results(uploaded_file, use_legacy_fix, workers=workers, cache=get_cache(),
+                                         batch_tokens=DEFAULT_BATCH_TOKENS if use_batching else None,
+                                         prescreen=get_prescreen() if use_prescreen else None,
+                                         similar=get_similarity_index() if use_similar else None,
+                                         previous=PreviousVersion(previous_entry[1]["analysis_data"])
+                                         if previous_entry else None,
+                                         on_partial=show_partial)
+        with recording(collect_metrics) as run_metrics, quota_session(session_id):
+            for completed, (i, res) in enumerate(analyses, start=1):
+                analysis_by_index[i] = res
+                risk_counts[res['risk']] += 1
+                if first_result_seconds is None:
+                    first_result_seconds = time.perf_counter() - started
+
+                live_status.caption(f"{completed} clauses analyzed so far...")
+                live_metrics.markdown(f"🚩 **High:** {risk_counts['High']} &nbsp; ⚠️ **Medium:** {risk_counts['Medium']}"
+                                      f" &nbsp; ✅ **Low:** {risk_counts['Low']} &nbsp; ❌ **{FAILED}:** {risk_counts[FAILED]}")
+                slot = feed_slots.pop(res['id'], None) or live_feed.empty()
+                with slot.container():
+                    with st.expander(f"{clause_citation(res)} — {res['risk']} Risk"):
+                        st.write(f"**AI Analysis:** {res['explanation']}")
+        live.empty()
+
+        if not analysis_by_index:
             st.error("Text extraction failed. Try a digital PDF.")
             st.stop()
 
-        clauses = split_clauses(text)
-        analysis_data = []
-        risk_counts = {"High": 0, "Medium": 0, "Low": 0}
-        
-        # UI Progress Bar for 3D Feel
-        progress_bar = st.progress(0)
-        for i, clause_text in enumerate(clauses, start=1):
-            res = analyze_clause(clause_text)
-            res['clause'] = clause_text
-            res['id'] = i
-            analysis_data.append(res)
-            risk_counts[res['risk']] += 1
-            progress_bar.progress(i / len(clauses))
-        
-        df = pd.DataFrame(analysis_data)
-        
+        analysis_data = [analysis_by_index[i] for i in sorted(analysis_by_index)]
+        clauses = [res['clause'] for res in analysis_data]
+
         # Overall Score
-        status = "CRITICAL" if risk_counts["High"] >= 3 else "MODERATE" if risk_counts["High"] >= 1 else "SAFE"
+        status = overall_status(risk_counts)
+
+        result = {
+            "clauses": clauses,
+            "analysis_data": analysis_data,
+            "risk_counts": risk_counts,
+            "status": status,
+            "cache_hits": sum(1 for res in analysis_data if res.get("source") == "cache"),
+            "prescreened": sum(1 for res in analysis_data if res.get("source") == "prescreen"),
+            "reused": sum(1 for res in analysis_data if res.get("source") == "similar"),
+            "carried": sum(1 for res in analysis_data if res.get("source") == "previous"),
+            "metrics": run_metrics.to_dict(),
+        }
+        store.put(doc_key, result, size=result_size(result))
+        get_audit_log().record(audit_record(
+            uploaded_file.name, status, analysis_data, seconds=time.perf_counter() - started,
+            first_result_seconds=first_result_seconds,
+            sha256=hashlib.sha256(uploaded_file.getvalue()).hexdigest()))
+        st.session_state["audit_result"] = (doc_key, result)
+
+    clauses = result["clauses"]
+    analysis_data = result["analysis_data"]
+    risk_counts = result["risk_counts"]
+    status = result["status"]
+    cache_hits = result["cache_hits"]
+    prescreened = result["prescreened"]
+    reused = result["reused"]
+    df = pd.DataFrame(analysis_data, columns=["id", "ref", "page", "risk", "explanation", "suggestion", "clause",
+                                              "source", "similarity", "previous_ref"])
 
     # --- Dashboard View ---
     st.title(f"📊 Audit: {uploaded_file.name}")
@@ -185,6 +303,42 @@ else:
     m2.metric("Total Clauses", len(clauses))
     m3.metric("Red Flags 🚩", risk_counts["High"])
     m4.metric("Review Items ⚠️", risk_counts["Medium"])
+    st.caption(f"♻️ {cache_hits} of {len(clauses)} clauses answered from the analysis cache · "
+               f"🧬 {reused} reused from near-identical clauses · "
+               f"🧹 {prescreened} boilerplate clauses screened locally (AI calls avoided)"
+               + (f" · 📑 {result['carried']} unchanged since the previous version" if result.get("carried") else ""))
+
+    if previous_entry:
+        # The diff only needs the two versions' rows; keep it until either changes
+        diff_key = (previous_entry[0], doc_key)
+        revision = st.session_state.get("revision_diff")
+        if not revision or revision[0] != diff_key:
+            revision = (diff_key, risk_changes(previous_entry[1]["analysis_data"], analysis_data))
+            st.session_state["revision_diff"] = revision
+        changes, change_counts = revision[1]
+        with st.expander(f"📑 Changes since the previous version — {change_counts[MODIFIED]} edited, "
+                         f"{change_counts[NEW]} new, {change_counts[REMOVED]} removed", expanded=True):
+            st.caption(f"{change_counts[UNCHANGED]} clauses unchanged. Risk changes:")
+            if not changes:
+                st.write("No clause changed.")
+            for change in changes:
+                line = describe_change(change)
+                direction = risk_direction(change)
+                if direction > 0:
+                    st.error(f"🔺 {line}")
+                elif direction < 0:
+                    st.success(f"🔻 {line}")
+                else:
+                    st.info(line)
+
+    if risk_counts[FAILED]:
+        st.warning(f"{risk_counts[FAILED]} clause(s) could not be analyzed by the AI and are marked "
+                   f"'{FAILED}'. Review them manually or re-run the audit.")
+        if st.button("🔄 Re-run Audit"):
+            # Successful clauses come back from the analysis cache; only failures are re-sent
+            store.discard(doc_key)
+            st.session_state.pop("audit_result", None)
+            st.rerun()
 
     st.divider()
     
@@ -195,23 +349,87 @@ else:
         with c1:
             fig = px.pie(df, names='risk', hole=0.6, 
                          color='risk',
-                         color_discrete_map={'High':'#ef4444', 'Medium':'#f59e0b', 'Low':'#10b981'})
+                         color_discrete_map={'High':'#ef4444', 'Medium':'#f59e0b', 'Low':'#10b981', FAILED:'#64748b'})
             fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', font_color="white")
             st.plotly_chart(fig, use_container_width=True)
         with c2:
             st.subheader("⚠️ Critical Red Flags")
             for _, r in df[df["risk"] == "High"].iterrows():
-                st.error(f"**Clause {r['id']}:** {r['explanation']}")
+                st.error(f"**{clause_citation(r)}:** {r['explanation']}")
+
+        st.subheader("📝 Executive Summary")
+        # Costs a few AI calls per document, so it is made on request and kept with the result
+        if "summary" not in result and st.button("✨ Summarize Whole Contract"):
+            with st.spinner("Summarizing every section of the contract..."):
+                try:
+                    with quota_session(session_id):
+                        result["summary"] = summarize_clauses([row["clause"] for row in analysis_data],
+                                                              workers=workers, cache=get_cache(),
+                                                              refs=[row.get("ref") or row["id"] for row in analysis_data])
+                    # Re-put so the store's size bound counts the summary too
+                    store.put(doc_key, result, size=result_size(result))
+                except Exception as e:
+                    st.error(f"Summary failed ({type(e).__name__}: {e}). Try again in a moment.")
+        if "summary" in result:
+            st.markdown(result["summary"])
 
     with tab2:
         for _, r in df.iterrows():
-            with st.expander(f"Clause {r['id']} — {r['risk']} Risk"):
+            with st.expander(f"{clause_citation(r)} — {r['risk']} Risk"):
                 st.write(f"**AI Analysis:** {r['explanation']}")
                 st.success(f"**Fix:** {r['suggestion']}")
+                if r['source'] == "similar":
+                    st.info(f"🧬 Analysis reused from a {r['similarity']:.0%} similar clause analyzed earlier")
+                elif r['source'] == "previous":
+                    st.info(f"📑 Unchanged since the previous version (clause {r['previous_ref'] or '—'} there)")
                 st.text_area("Original Text", r['clause'], height=80, disabled=True)
 
     with tab3:
         # Download Logic
         col_pdf, col_txt = st.columns(2)
-        pdf = generate_pdf_report(uploaded_file.name, status, analysis_data)
-        st.download_button("📄 Download PDF Report", data=pdf, file_name="Audit.pdf")
\ No newline at end of file
+        # Reports are rendered only when a download is clicked, then kept with the analysis result
+        def report_bytes(kind, render):
+            def load():
+                if kind not in result:
+                    result[kind] = render(uploaded_file.name, status, analysis_data)
+                    store.put(doc_key, result, size=result_size(result))
+                return result[kind]
+            return load
+
+        with col_pdf:
+            font_error = missing_font_error(uploaded_file.name, analysis_data)
+            if font_error:
+                st.error(f"📄 {font_error}")
+            else:
+                st.download_button("📄 Download PDF Report", data=report_bytes("pdf", generate_pdf_report),
+                                   file_name="Audit.pdf", mime="application/pdf")
+        with col_txt:
+            st.download_button("📝 Download TXT Report",
+                               data=report_bytes("txt", lambda *args: generate_txt_report(*args).encode("utf-8")),
+                               file_name="Audit.txt", mime="text/plain")
+
+    # --- Performance Panel ---
+    with st.expander("⏱️ Performance"):
+        if not result["metrics"]["stages"]:
+            st.caption("No timings were collected for this audit. Turn on 'Collect Performance Metrics' and re-run it.")
+        else:
+            st.markdown("**This audit** — time per stage, excluding time spent in nested stages")
+            st.dataframe(pd.DataFrame(stage_summary(result["metrics"])), hide_index=True)
+            st.caption(" · ".join(f"{name}: {value:,}" for name, value in result["metrics"]["counters"].items()))
+
+        totals = METRICS.to_dict()
+        st.markdown("**Since server start** — all sessions, including report rendering")
+        if totals["stages"]:
+            st.dataframe(pd.DataFrame(stage_summary(totals)), hide_index=True)
+        quota = get_scheduler().stats()
+        if quota:
+            st.caption(f"🚦 Gemini quota: {quota['rpm'] or 'unlimited'} requests/min, "
+                       f"{format(quota['tpm'], ',') if quota['tpm'] else 'unlimited'} tokens/min · "
+                       f"{sum(quota['waiting'].values())} requests waiting from {len(quota['waiting'])} session(s) · "
+                       f"rate at {quota['rate_factor']:.0%}"
+                       + (f" · paused {quota['paused_seconds']} s after a rate limit" if quota['paused_seconds'] else ""))
+        col_prom, col_json = st.columns(2)
+        col_prom.download_button("📈 Export Prometheus", data=METRICS.to_prometheus,
+                                 file_name="contract_insight.prom", mime="text/plain")
+        col_json.download_button("🧾 Export JSON", data=METRICS.to_json,
+                                 file_name="contract_insight_metrics.json", mime="application/json")
\ No newline at end of file
@@ -0,0 +1,328 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from risk_analyzer import MODEL_NAME, RISK_LEVELS, FAILED
+
+# Every finished audit becomes one record with a fixed schema. Records are
+# queued and written by a background thread, so the app never waits on disk:
+# they are appended to a rotating JSON-lines log and indexed in SQLite for
+# history queries.
+AUDIT_DIR = os.environ.get("CONTRACT_AUDIT_DIR", "audit_logs")
+LEGACY_LOG_PATH = "audit_log.json"
+SCHEMA_VERSION = 2
+MAX_LOG_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+FLUSH_INTERVAL = 1.0       # seconds a record may wait in memory
+FLUSH_BATCH = 200          # records written per transaction
+MAX_QUEUED = 10_000        # beyond this, records are dropped (and counted) rather than block
+
+logger = logging.getLogger(__name__)
+
+# Column name -> SQLite type, in record order
+FIELDS = {
+    "record_id": "TEXT",
+    "ts": "REAL",                     # epoch seconds
+    "time": "TEXT",                   # local time, ISO 8601
+    "source": "TEXT",                 # "app", "batch" or "legacy"
+    "file": "TEXT",
+    "sha256": "TEXT",
+    "overall_risk": "TEXT",           # CRITICAL, MODERATE or SAFE
+    "clause_count": "INTEGER",
+    "high": "INTEGER",
+    "medium": "INTEGER",
+    "low": "INTEGER",
+    "failed": "INTEGER",
+    "cache_hits": "INTEGER",
+    "prescreened": "INTEGER",
+    "reused": "INTEGER",
+    "carried": "INTEGER",             # unchanged since the previous version (revision mode)
+    "model_calls": "INTEGER",         # clauses answered by the model
+    "model": "TEXT",
+    "seconds": "REAL",                # upload to last clause analyzed
+    "first_result_seconds": "REAL",
+    "schema": "INTEGER",
+}
+# The old log wrote "MEDIUM" for what the app now calls MODERATE
+_LEGACY_RISK = {"MEDIUM": "MODERATE", "HIGH": "CRITICAL", "LOW": "SAFE"}
+
+def audit_record(file, overall_risk, analysis_data, seconds=None, first_result_seconds=None,
+                 sha256=None, source="app", model=MODEL_NAME):
+    """Builds a schema record for one audited document from its result rows."""
+    counts = {level: 0 for level in (*RISK_LEVELS, FAILED)}
+    sources = {"cache": 0, "prescreen": 0, "similar": 0, "previous": 0}
+    for row in analysis_data:
+        counts[row["risk"]] += 1
+        if row.get("source") in sources:
+            sources[row["source"]] += 1
+    now = time.time()
+    return {
+        "record_id": uuid.uuid4().hex,
+        "ts": now,
+        "time": datetime.fromtimestamp(now).isoformat(sep=" "),
+        "source": source,
+        "file": file,
+        "sha256": sha256,
+        "overall_risk": overall_risk,
+        "clause_count": len(analysis_data),
+        "high": counts["High"],
+        "medium": counts["Medium"],
+        "low": counts["Low"],
+        "failed": counts[FAILED],
+        "cache_hits": sources["cache"],
+        "prescreened": sources["prescreen"],
+        "reused": sources["similar"],
+        "carried": sources["previous"],
+        "model_calls": len(analysis_data) - sum(sources.values()),
+        "model": model,
+        "seconds": None if seconds is None else round(seconds, 3),
+        "first_result_seconds": None if first_result_seconds is None else round(first_result_seconds, 3),
+        "schema": SCHEMA_VERSION,
+    }
+
+def legacy_record(line):
+    """Converts one line of the old audit_log.json to a schema record, or None if it holds no audit."""
+    try:
+        old = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(old, dict) or "file" not in old or "time" not in old:
+        return None
+    try:
+        moment = datetime.fromisoformat(old["time"])
+    except (TypeError, ValueError):
+        return None
+    record = dict.fromkeys(FIELDS)
+    risk = str(old.get("overall_risk") or "").upper()
+    record.update(
+        # Derived from the line itself, so importing the same file twice adds nothing
+        record_id="legacy-" + hashlib.sha256(line.strip().encode("utf-8")).hexdigest()[:32],
+        ts=moment.timestamp(),
+        time=moment.isoformat(sep=" "),
+        source="legacy",
+        file=old["file"],
+        overall_risk=_LEGACY_RISK.get(risk, risk or None),
+        # Older writers used "clauses" for the count
+        clause_count=old.get("clause_count", old.get("clauses")),
+        schema=SCHEMA_VERSION,
+    )
+    return record
+
+class AuditLog:
+    """
+    Buffered audit writer plus query helpers over its SQLite index.
+    record() only puts the record on a queue; a daemon thread appends
+    queued records to the JSON-lines log and the index in batches.
+    """
+    def __init__(self, directory=AUDIT_DIR, max_log_bytes=MAX_LOG_BYTES, backup_count=BACKUP_COUNT):
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "audit_log.jsonl")
+        self.index_path = os.path.join(directory, "audit_index.sqlite3")
+        self.max_log_bytes = max_log_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=MAX_QUEUED)
+        self._lock = threading.Lock()
+
+        # The writer thread has its own connection; this one serves queries
+        self._conn = self._connect()
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = ", ".join(f"{name} {kind}" for name, kind in FIELDS.items())
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS audits ({columns}, UNIQUE (record_id))")
+            # Indexes made by an older schema get the newer columns (empty for their rows)
+            present = {row[1] for row in self._conn.execute("PRAGMA table_info(audits)")}
+            for name, kind in FIELDS.items():
+                if name not in present:
+                    self._conn.execute(f"ALTER TABLE audits ADD COLUMN {name} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_audits_ts ON audits (ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_audits_risk_ts ON audits (overall_risk, ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_audits_seconds ON audits (seconds)")
+
+        self._writer = threading.Thread(target=self._write_loop, name="audit-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, check_same_thread=False, timeout=30)
+
+    # --- Writing ---
+
+    def record(self, record):
+        """Queues a record from audit_record(); never blocks the caller."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Blocks until every queued record is on disk."""
+        self._queue.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < FLUSH_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, batch)
+            except Exception as e:
+                # A full disk must not take the app down; the records are lost and counted
+                with self._lock:
+                    self.dropped += len(batch)
+                logger.error("could not write %d audit records: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self):
+        """Records waiting to be written, and records lost to a full queue or a failed write."""
+        with self._lock:
+            return {"queued": self._queue.qsize(), "dropped": self.dropped}
+
+    def _write(self, conn, batch):
+        self._rotate_if_needed()
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+        self._index(conn, batch)
+
+    def _index(self, conn, records):
+        names = list(FIELDS)
+        with conn:
+            cur = conn.executemany(
+                f"INSERT OR IGNORE INTO audits ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                [[record.get(name) for name in names] for record in records])
+        return cur.rowcount
+
+    def _rotate_if_needed(self):
+        """Size-based rotation: audit_log.jsonl -> .1 -> .2 ... up to backup_count files."""
+        try:
+            if os.path.getsize(self.log_path) < self.max_log_bytes:
+                return
+        except OSError:
+            return
+        for n in range(self.backup_count - 1, 0, -1):
+            older = f"{self.log_path}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.log_path}.{n + 1}")
+        os.replace(self.log_path, f"{self.log_path}.1")
+
+    def import_legacy(self, path=LEGACY_LOG_PATH):
+        """
+        Indexes the records of the old audit_log.json (skipping blank and broken
+        lines) and returns how many were new. Safe to run more than once.
+        """
+        with open(path, encoding="utf-8") as f:
+            records = [record for record in map(legacy_record, f) if record]
+        with self._lock:
+            return self._index(self._conn, records)
+
+    # --- Queries (all served from the index) ---
+
+    def query(self, overall_risk=None, since=None, until=None, limit=100):
+        """Newest-first records, optionally filtered by risk and a [since, until) time range."""
+        where, params = self._filters(overall_risk, since, until)
+        sql = f"SELECT * FROM audits{where} ORDER BY ts DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            names = [column[0] for column in cur.description]
+            return [dict(zip(names, row)) for row in cur]
+
+    def count(self, overall_risk=None, since=None, until=None):
+        where, params = self._filters(overall_risk, since, until)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM audits{where}", params).fetchone()[0]
+
+    def latency_percentile(self, percentile=95, since=None, until=None):
+        """Analysis time (seconds) below which `percentile`% of audits finished, or None."""
+        where, params = self._filters(None, since, until)
+        where += (" AND" if where else " WHERE") + " seconds IS NOT NULL"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM audits{where}", params).fetchone()[0]
+            if not total:
+                return None
+            # Nearest-rank percentile, read off the seconds index
+            rank = max(0, -(-total * percentile // 100) - 1)
+            return self._conn.execute(f"SELECT seconds FROM audits{where} ORDER BY seconds LIMIT 1 OFFSET ?",
+                                      [*params, rank]).fetchone()[0]
+
+    def risk_summary(self, since=None, until=None):
+        """{overall_risk: number of audits} over a time range."""
+        where, params = self._filters(None, since, until)
+        with self._lock:
+            return dict(self._conn.execute(
+                f"SELECT overall_risk, COUNT(*) FROM audits{where} GROUP BY overall_risk", params))
+
+    @staticmethod
+    def _filters(overall_risk, since, until):
+        clauses, params = [], []
+        if overall_risk:
+            clauses.append("overall_risk = ?")
+            params.append(overall_risk)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def _timestamp(moment):
+    return moment.timestamp() if isinstance(moment, datetime) else float(moment)
+
+def start_of_month(now=None):
+    now = now or datetime.now()
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+_shared_log = None
+_shared_lock = threading.Lock()
+
+def get_audit_log():
+    """
+    Process-wide audit log, so all Streamlit sessions share one writer thread.
+    History from the old audit_log.json is indexed on first use.
+    """
+    global _shared_log
+    with _shared_lock:
+        if _shared_log is None:
+            _shared_log = AuditLog()
+            if os.path.exists(LEGACY_LOG_PATH):
+                _shared_log.import_legacy(LEGACY_LOG_PATH)
+        return _shared_log
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Import and query the audit history.")
+    arg_parser.add_argument("--dir", default=AUDIT_DIR)
+    arg_parser.add_argument("--import-legacy", metavar="PATH", nargs="?", const=LEGACY_LOG_PATH,
+                            help=f"index an old JSON-lines log (default {LEGACY_LOG_PATH})")
+    arg_parser.add_argument("--risk", help="list audits with this overall risk, e.g. CRITICAL")
+    arg_parser.add_argument("--this-month", action="store_true", help="only audits since the 1st of this month")
+    args = arg_parser.parse_args()
+
+    log = AuditLog(args.dir)
+    if args.import_legacy:
+        print(f"Imported {log.import_legacy(args.import_legacy)} records from {args.import_legacy}")
+    since = start_of_month() if args.this_month else None
+    if args.risk:
+        for record in log.query(args.risk.upper(), since=since, limit=None):
+            print(f"{record['time']}  {record['overall_risk']:8} {record['clause_count'] or '?':>4} clauses  {record['file']}")
+    print(f"{log.count(since=since)} audits, by risk: {log.risk_summary(since=since)}, "
+          f"p95 analysis time: {log.latency_percentile(95, since=since)} s")
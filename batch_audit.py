@@ -0,0 +1,234 @@
+"""
+Headless batch audit of a directory of contracts, without Streamlit.
+
+    python batch_audit.py contracts/ --out audit_results.jsonl --reports reports/
+
+Every document becomes one JSON line in --out. Re-running with the same
+--out skips documents whose path and content hash already completed with
+every clause analyzed, so an interrupted overnight run resumes where it
+stopped. --backend module:attr plugs in another model (an object with
+generate_content, or a factory returning one) so a run can work offline
+against a local stand-in.
+"""
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import risk_analyzer
+from risk_analyzer import FAILED
+from analysis_cache import AnalysisCache, DEFAULT_CACHE_PATH
+from analysis_engine import DEFAULT_WORKERS, DEFAULT_BATCH_TOKENS
+from pipeline import iter_document_results, empty_risk_counts, overall_status
+from prescreen import get_prescreen
+from similarity_index import SimilarityIndex, DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD
+from audit_log import AuditLog, AUDIT_DIR, audit_record
+from instrumentation import Metrics, recording, stage_summary
+import quota_scheduler
+from quota_scheduler import BATCH, DEFAULT_RPM, DEFAULT_TPM, quota_session
+from report_generator import missing_font_error, write_pdf_report, write_txt_report
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# Per-process state set up by _init_worker
+_options = {}
+
+def load_backend(spec):
+    """Resolves "module:attr" to a model backend; classes and other factories are called."""
+    module_name, _, attr = spec.partition(":")
+    backend = getattr(importlib.import_module(module_name), attr or "model")
+    if inspect.isclass(backend) or not hasattr(backend, "generate_content"):
+        backend = backend()
+    return backend
+
+def find_documents(root):
+    for folder, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(folder, name)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_completed(out_path):
+    """(file, sha256) pairs already audited successfully in a previous run."""
+    completed = set()
+    if os.path.exists(out_path):
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if record.get("status") == "ok":
+                    completed.add((record["file"], record["sha256"]))
+    return completed
+
+def _init_worker(options):
+    _options.update(options)
+    # Worker processes cannot share one scheduler, so each gets an equal share of the quota (0: no limit)
+    share = lambda limit: max(1, limit // options["processes"]) if limit > 0 else 0
+    quota_scheduler.configure(share(options["rpm"]), share(options["tpm"]))
+    if options["backend"]:
+        risk_analyzer.set_model(load_backend(options["backend"]))
+    _options["cache"] = AnalysisCache(options["cache_path"]) if options["cache_path"] else None
+    _options["similar"] = SimilarityIndex(options["similar_path"], options["similar_threshold"]) if options["similar_path"] else None
+
+def audit_file(path, rel_path, sha256):
+    """Audits one document and returns its JSONL record (never raises)."""
+    options = _options
+    started = time.perf_counter()
+    record = {"file": rel_path, "sha256": sha256}
+    try:
+        # Batch priority: if a process also serves the app, interactive audits go first
+        with recording() as metrics, quota_session(f"batch:{rel_path}", BATCH), open(path, "rb") as f:
+            rows = dict(iter_document_results(
+                f, options["legacy_fix"], page_workers=1,
+                workers=options["clause_workers"], cache=options["cache"],
+                batch_tokens=options["batch_tokens"], similar=options["similar"],
+                prescreen=get_prescreen() if options["prescreen"] else None))
+        analysis_data = [rows[i] for i in sorted(rows)]
+        risk_counts = empty_risk_counts()
+        for row in analysis_data:
+            risk_counts[row["risk"]] += 1
+        status = overall_status(risk_counts)
+
+        if options["reports_dir"]:
+            base = os.path.join(options["reports_dir"], rel_path)
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            # A Hindi PDF without a Devanagari font is skipped; the analysis and TXT report still count
+            font_error = missing_font_error(os.path.basename(path), analysis_data)
+            if font_error:
+                record["warning"] = f"PDF report skipped: {font_error}"
+            with recording() as report_metrics:
+                if not font_error:
+                    with open(base + ".audit.pdf", "wb") as f:
+                        write_pdf_report(f, os.path.basename(path), status, analysis_data)
+                with open(base + ".audit.txt", "w", encoding="utf-8") as f:
+                    write_txt_report(f, os.path.basename(path), status, analysis_data)
+            metrics.merge(report_metrics.to_dict())
+
+        # Documents with failed clauses are retried by the next run; cached clauses stay free
+        record.update(status="incomplete" if risk_counts[FAILED] else "ok", overall_risk=status,
+                      clause_count=len(analysis_data), risk_counts=risk_counts, clauses=analysis_data,
+                      metrics=metrics.to_dict())
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Audit every contract in a directory.")
+    arg_parser.add_argument("input_dir")
+    arg_parser.add_argument("--out", default="audit_results.jsonl", help="JSONL results file (appended)")
+    arg_parser.add_argument("--reports", metavar="DIR", help="also write PDF and TXT reports here")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="documents processed in parallel (processes)")
+    arg_parser.add_argument("--clause-workers", type=int, default=DEFAULT_WORKERS,
+                            help="concurrent model calls per document")
+    arg_parser.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS,
+                            help="clause tokens per batched request, 0 to send clauses one by one")
+    arg_parser.add_argument("--legacy-fix", action="store_true", help="convert Kruti Dev text to Unicode")
+    arg_parser.add_argument("--no-prescreen", action="store_true", help="send boilerplate clauses to the model too")
+    arg_parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="analysis cache file, '' to disable")
+    arg_parser.add_argument("--similar-index", default=DEFAULT_INDEX_PATH,
+                            help="near-duplicate clause index file, '' to disable reuse")
+    arg_parser.add_argument("--similarity", type=float, default=DEFAULT_THRESHOLD,
+                            help="shingle similarity (0-1) at which a clause reuses an indexed analysis")
+    arg_parser.add_argument("--audit-dir", default=AUDIT_DIR, help="audit history directory, '' to disable")
+    arg_parser.add_argument("--metrics", metavar="PATH",
+                            help="write stage timings and AI call counters here (Prometheus text, or JSON for .json)")
+    arg_parser.add_argument("--rpm", type=int, default=DEFAULT_RPM,
+                            help="model requests per minute for the whole run, 0 for no limit")
+    arg_parser.add_argument("--tpm", type=int, default=DEFAULT_TPM,
+                            help="model tokens per minute for the whole run, 0 for no limit")
+    arg_parser.add_argument("--backend", help="model backend as module:attr (default: Gemini); offline "
+                                               "backends still go through --rpm/--tpm, pass 0 for no limit")
+    args = arg_parser.parse_args(argv)
+
+    options = {
+        "legacy_fix": args.legacy_fix,
+        "clause_workers": args.clause_workers,
+        "batch_tokens": args.batch_tokens or None,
+        "prescreen": not args.no_prescreen,
+        "cache_path": args.cache,
+        "similar_path": args.similar_index,
+        "similar_threshold": args.similarity,
+        "backend": args.backend,
+        "reports_dir": args.reports,
+        "rpm": args.rpm,
+        "tpm": args.tpm,
+        "processes": max(1, args.workers),
+    }
+
+    completed = load_completed(args.out)
+    todo = []
+    for path in find_documents(args.input_dir):
+        rel_path = os.path.relpath(path, args.input_dir)
+        sha256 = file_sha256(path)
+        if (rel_path, sha256) not in completed:
+            todo.append((path, rel_path, sha256))
+    print(f"{len(todo)} documents to audit ({len(completed)} already done)", file=sys.stderr)
+
+    audit_log = AuditLog(args.audit_dir) if args.audit_dir else None
+    # Workers record per document; the totals are summed here
+    totals = Metrics()
+    started = time.perf_counter()
+    done = failed = clauses = 0
+    with open(args.out, "a", encoding="utf-8") as out:
+        def write(record):
+            nonlocal done, failed, clauses
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            done += 1
+            failed += record["status"] != "ok"
+            clauses += record.get("clause_count", 0)
+            totals.merge(record.get("metrics", {}))
+            if audit_log and "clauses" in record:
+                audit_log.record(audit_record(record["file"], record["overall_risk"], record["clauses"],
+                                              seconds=record["seconds"], sha256=record["sha256"], source="batch"))
+            print(f"[{done}/{len(todo)}] {record['status']:5} {record['file']} ({record['seconds']}s)",
+                  file=sys.stderr)
+            if record.get("warning"):
+                print(f"  warning: {record['warning']}", file=sys.stderr)
+
+        if args.workers <= 1:
+            _init_worker(options)
+            for job in todo:
+                write(audit_file(*job))
+        else:
+            # spawn, not fork: the audit log's writer thread and SQLite connection
+            # must not be copied into workers mid-lock
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(options,),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                for future in as_completed([pool.submit(audit_file, *job) for job in todo]):
+                    write(future.result())
+
+    if audit_log:
+        audit_log.flush()
+    if args.metrics:
+        totals.write(args.metrics)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    for row in stage_summary(totals.to_dict()):
+        print(f"  {row['stage']:18} {row['calls']:6} calls {row['total_s']:9.3f} s  mean {row['mean_ms']:9.2f} ms",
+              file=sys.stderr)
+    print(f"Audited {done} documents ({failed} failed), {clauses} clauses in {elapsed:.1f}s: "
+          f"{done / elapsed * 60:.1f} docs/min, {clauses / elapsed:.1f} clauses/sec", file=sys.stderr)
+    dropped = audit_log.stats()["dropped"] if audit_log else 0
+    if dropped:
+        print(f"Audit history: {dropped} records could not be written (results are still in {args.out})",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
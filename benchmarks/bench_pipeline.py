@@ -0,0 +1,257 @@
+"""
+Benchmark: every pipeline stage and the full pipeline on synthetic contracts,
+with benchmarks.fake_backend standing in for Gemini.
+
+Each benchmark runs in a fresh process (so peak RSS is its own) and repeats
+one document --repeat times. It reports clauses/sec over all repeats, p50/p95
+of the per-document time and the process's peak RSS. Results are saved as
+JSON; --compare prints the change against an earlier run and --max-slowdown
+makes the run fail on a regression, for CI.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline --clauses 200 --repeat 5
+    python -m benchmarks.bench_pipeline --only pipeline --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# google.generativeai's deprecation notice would repeat once per benchmark process
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import quota_scheduler
+import risk_analyzer
+from parser import iter_pages
+from hindi_fixer import kruti_to_unicode
+from clause_splitter import split_clauses
+from prescreen import Prescreen
+from analysis_engine import iter_analyses
+from pipeline import iter_document_results
+from report_generator import write_pdf_report, write_txt_report
+from benchmarks.fake_backend import FakeModel, fake_analysis
+from benchmarks.synthetic_contracts import LANGUAGES, FORMATS, contract_text, write_contract
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def document(config, language, fmt):
+    return write_contract(config["data_dir"], language, fmt, config["clauses"])
+
+def clause_texts(config, language):
+    text = contract_text(language, config["clauses"])
+    return [clause.text for clause in split_clauses(kruti_to_unicode(text) if language == "kruti" else text)]
+
+def fake_model(config):
+    return FakeModel(config["latency"], config["jitter"], config["error_rate"], config["malformed_rate"])
+
+def engine_options(config):
+    return {"workers": config["workers"], "batch_tokens": config["batch_tokens"] or None,
+            "backoff": config["backoff"]}
+
+# Each benchmark returns a unit of work: a callable processing one document
+# and returning how many clauses it handled
+def bench_extract(config, language, fmt):
+    path = document(config, language, fmt)
+
+    def unit():
+        with open(path, "rb") as f:
+            text = "\n".join(page_text for _, page_text in iter_pages(f, workers=1))
+        return config["clauses"] if text else 0
+    return unit
+
+def bench_kruti(config):
+    text = contract_text("kruti", config["clauses"])
+    return lambda: kruti_to_unicode(text) and config["clauses"]
+
+def bench_split(config, language):
+    text = contract_text(language, config["clauses"])
+    if language == "kruti":
+        text = kruti_to_unicode(text)
+    return lambda: len(split_clauses(text))
+
+def bench_prescreen(config, language):
+    clauses = clause_texts(config, language)
+    prescreen = Prescreen()
+
+    def unit():
+        for clause in clauses:
+            prescreen.screen(clause)
+        return len(clauses)
+    return unit
+
+def bench_analyze(config, language):
+    clauses = clause_texts(config, language)
+    risk_analyzer.set_model(fake_model(config))
+    return lambda: sum(1 for _ in iter_analyses(clauses, **engine_options(config)))
+
+def bench_report(config, kind):
+    clauses = clause_texts(config, "english")
+    rows = [{**fake_analysis(clause), "clause": clause, "id": n, "ref": f"Clause {n}", "page": None}
+            for n, clause in enumerate(clauses, start=1)]
+
+    def unit():
+        if kind == "pdf":
+            write_pdf_report(io.BytesIO(), "synthetic.pdf", "MODERATE", rows)
+        else:
+            write_txt_report(io.StringIO(), "synthetic.txt", "MODERATE", rows)
+        return len(rows)
+    return unit
+
+def bench_pipeline(config, language, fmt):
+    path = document(config, language, fmt)
+    risk_analyzer.set_model(fake_model(config))
+    prescreen = Prescreen()
+
+    def unit():
+        with open(path, "rb") as f:
+            return sum(1 for _ in iter_document_results(f, language == "kruti", page_workers=1,
+                                                        prescreen=prescreen, **engine_options(config)))
+    return unit
+
+def benchmarks():
+    """name -> (factory, args), in run order."""
+    registry = {}
+    for language in LANGUAGES:
+        for fmt in FORMATS:
+            registry[f"extract/{language}/{fmt}"] = (bench_extract, (language, fmt))
+    registry["kruti_to_unicode"] = (bench_kruti, ())
+    for language in LANGUAGES:
+        registry[f"split_clauses/{language}"] = (bench_split, (language,))
+        registry[f"prescreen/{language}"] = (bench_prescreen, (language,))
+    registry["analyze/english"] = (bench_analyze, ("english",))
+    registry["report/pdf"] = (bench_report, ("pdf",))
+    registry["report/txt"] = (bench_report, ("txt",))
+    for language in LANGUAGES:
+        for fmt in FORMATS:
+            registry[f"pipeline/{language}/{fmt}"] = (bench_pipeline, (language, fmt))
+    return registry
+
+def run_benchmark(name, config):
+    """Runs one benchmark in this process and returns its result row."""
+    factory, args = benchmarks()[name]
+    # The fake model goes through the quota like Gemini; by default nothing is throttled,
+    # so the timings are the code's and not GEMINI_RPM's
+    quota_scheduler.configure(config["rpm"], config["tpm"])
+    unit = factory(config, *args)
+    unit()  # warm-up: imports, font parsing, regex compilation
+    seconds, clauses = [], 0
+    for _ in range(config["repeat"]):
+        started = time.perf_counter()
+        clauses += unit()
+        seconds.append(time.perf_counter() - started)
+    seconds.sort()
+    return {
+        "name": name,
+        "clauses": clauses,
+        "seconds": round(sum(seconds), 4),
+        "clauses_per_sec": round(clauses / max(sum(seconds), 1e-9), 1),
+        "p50_ms": round(statistics.median(seconds) * 1000, 2),
+        "p95_ms": round(seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))] * 1000, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def run_isolated(name, config):
+    # spawn, not fork: a fresh interpreter, so peak RSS is this benchmark's alone
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_benchmark, name, config).result()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Prints the throughput change per benchmark; returns {name: relative change}."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["name"]: row for row in json.load(f)["results"]}
+    changes = {}
+    print(f"\ncompared with {baseline_path}:")
+    for row in results:
+        before = baseline.get(row["name"])
+        if not before or not before["clauses_per_sec"]:
+            continue
+        changes[row["name"]] = row["clauses_per_sec"] / before["clauses_per_sec"] - 1
+        print(f"  {row['name']:28} {before['clauses_per_sec']:10.1f} -> {row['clauses_per_sec']:10.1f} "
+              f"clauses/sec ({changes[row['name']]:+.1%})")
+    return changes
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--clauses", type=int, default=200, help="clauses per synthetic document")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    arg_parser.add_argument("--only", nargs="+", default=[], help="run benchmarks whose name contains any of these")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="fake model latency per call (seconds)")
+    arg_parser.add_argument("--jitter", type=float, default=0.02, help="standard deviation of the latency")
+    arg_parser.add_argument("--error-rate", type=float, default=0.02, help="share of calls failing transiently")
+    arg_parser.add_argument("--malformed-rate", type=float, default=0.02, help="share of malformed replies (cut short, or wrapped in prose)")
+    arg_parser.add_argument("--workers", type=int, default=8, help="concurrent model calls")
+    arg_parser.add_argument("--batch-tokens", type=int, default=2000, help="0 to send clauses one by one")
+    arg_parser.add_argument("--backoff", type=float, default=0.05, help="retry backoff (seconds)")
+    arg_parser.add_argument("--rpm", type=int, default=0, help="quota requests per minute, 0 for no limit")
+    arg_parser.add_argument("--tpm", type=int, default=0, help="quota tokens per minute, 0 for no limit")
+    arg_parser.add_argument("--data-dir", default=os.path.join(".cache", "bench_documents"))
+    arg_parser.add_argument("--out", help=f"results file (default: {RESULTS_DIR}/<time>.json)")
+    arg_parser.add_argument("--compare", metavar="RESULTS", help="an earlier results file to compare with")
+    arg_parser.add_argument("--max-slowdown", type=float, metavar="FRACTION",
+                            help="with --compare, exit 1 if any benchmark lost more throughput than this")
+    arg_parser.add_argument("--in-process", action="store_true", help="skip process isolation (faster, RSS is shared)")
+    args = arg_parser.parse_args()
+
+    config = {key: getattr(args, key) for key in ("clauses", "repeat", "latency", "jitter", "error_rate",
+                                                  "malformed_rate", "workers", "batch_tokens", "backoff",
+                                                  "rpm", "tpm", "data_dir")}
+    names = [name for name in benchmarks() if not args.only or any(part in name for part in args.only)]
+    results = []
+    print(f"{'benchmark':28} {'clauses/sec':>12} {'p50 ms':>10} {'p95 ms':>10} {'peak RSS MB':>12}")
+    for name in names:
+        try:
+            row = run_benchmark(name, config) if args.in_process else run_isolated(name, config)
+        except Exception as e:
+            # e.g. no Unicode font for the Hindi PDF; the other benchmarks still run
+            print(f"{name:28} skipped: {type(e).__name__}: {e}")
+            continue
+        results.append(row)
+        print(f"{name:28} {row['clauses_per_sec']:12.1f} {row['p50_ms']:10.2f} {row['p95_ms']:10.2f} "
+              f"{row['peak_rss_mb'] if row['peak_rss_mb'] is not None else '-':>12}")
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+                   "python": platform.python_version(), "platform": platform.platform(),
+                   "cpus": os.cpu_count(), "config": config, "results": results}, f, indent=2)
+    print(f"results saved to {out}")
+
+    if args.compare:
+        changes = compare(results, args.compare)
+        if args.max_slowdown is not None:
+            regressions = [name for name, change in changes.items() if change < -args.max_slowdown]
+            if regressions:
+                print(f"regressions beyond {args.max_slowdown:.0%}: {', '.join(regressions)}")
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: similarity_index lookups on a large on-disk index.
+
+Builds (or reuses) an index of synthetic clauses, where every clause is one of
+a few variants of a template that differ in party names and amounts, then
+times lookups of unseen variants (should be reused) and of new clauses
+(should go to the AI).
+
+Run from the repository root:
+    python -m benchmarks.bench_similarity_index --clauses 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from similarity_index import SimilarityIndex, DEFAULT_MAX_ENTRIES
+
+VARIANTS_PER_TEMPLATE = 5
+CLAUSE_WORDS = 60
+RESULT = {"risk": "Medium", "explanation": "Synthetic clause.", "suggestion": "None."}
+
+_LEGAL_WORDS = ("the party shall indemnify landlord tenant employer employee premises agreement term "
+                "notice payment penalty arbitration court liability loss damage interest deposit rent "
+                "termination breach consent written period month days amount clause hereby thereof").split()
+
+def vocabulary(size, seed=3):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    made = {"".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)}
+    return _LEGAL_WORDS + sorted(made)
+
+def template(rng, vocab):
+    return [rng.choice(vocab) for _ in range(CLAUSE_WORDS)]
+
+def variant(words, rng, vocab):
+    """The template with a party name, a date and an amount filled in."""
+    name = f"{rng.choice(vocab).title()} {rng.choice(vocab).title()}"
+    return (f"{name}, {' '.join(words[:20])}, Rs. {rng.randint(1, 99)},{rng.randint(100, 999)}, "
+            f"{' '.join(words[20:40])} dated {rng.randint(1, 28)}.{rng.randint(1, 12)}.20{rng.randint(10, 30)} "
+            f"{' '.join(words[40:])}.")
+
+def template_words(t, vocab):
+    return template(random.Random(t), vocab)
+
+def build(index, clauses, vocab, chunk=10_000):
+    rng = random.Random(1)
+    started = time.perf_counter()
+    for start in range(0, clauses, chunk):
+        items = []
+        for n in range(start, min(start + chunk, clauses)):
+            words = template_words(n // VARIANTS_PER_TEMPLATE, vocab)
+            items.append((variant(words, rng, vocab), RESULT))
+        index.add_many(items)
+        done = min(start + chunk, clauses)
+        print(f"\r  indexed {done:,} clauses ({done / (time.perf_counter() - started):,.0f}/s)",
+              end="", flush=True)
+    print()
+
+def timed_lookups(index, texts):
+    latencies, hits = [], 0
+    for text in texts:
+        started = time.perf_counter()
+        hits += index.lookup(text) is not None
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return hits, statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--clauses", type=int, default=100_000, help="clauses in the index")
+    arg_parser.add_argument("--queries", type=int, default=2000)
+    arg_parser.add_argument("--path", default=os.path.join(".cache", "bench_similarity_index.sqlite3"))
+    args = arg_parser.parse_args()
+
+    vocab = vocabulary(20_000)
+    index = SimilarityIndex(args.path, max_entries=max(args.clauses, DEFAULT_MAX_ENTRIES))
+    present = index.stats()["entries"]
+    if present != args.clauses:
+        print(f"building an index of {args.clauses:,} clauses at {args.path}")
+        index.clear()
+        build(index, args.clauses, vocab)
+
+    rng = random.Random(2)
+    templates = args.clauses // VARIANTS_PER_TEMPLATE
+    seen = [variant(template_words(rng.randrange(templates), vocab), rng, vocab) for _ in range(args.queries)]
+    new = [variant(template(rng, vocab), rng, vocab) for _ in range(args.queries)]
+    for label, texts in (("unseen variants", seen), ("new clauses", new)):
+        hits, p50, p99 = timed_lookups(index, texts)
+        print(f"{label}: {hits / len(texts):.1%} reused, lookup p50 {p50:.0f} us, p99 {p99:.0f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: cold start of the Streamlit app.
+
+Starts a fresh interpreter, imports Streamlit (the server has it loaded before
+any script runs), then times the first run of app.py up to the landing page
+with Streamlit's headless AppTest runner. With --importtime the child runs
+under `python -X importtime` and the slowest imports made by the script run
+are listed, to show what still loads before the page renders.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 3 --importtime
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in the child process; prints one JSON line with the timings
+CHILD = r"""
+import json, time, warnings
+warnings.filterwarnings("ignore")
+import streamlit
+from streamlit.testing.v1 import AppTest
+import sys
+print("@@script-start", file=sys.stderr, flush=True)
+started = time.perf_counter()
+app = AppTest.from_file("app.py", default_timeout=120)
+app.run()
+first = time.perf_counter() - started
+started = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - started
+print(json.dumps({"first_run": first, "rerun": rerun, "exceptions": [e.value for e in app.exception],
+                  "heavy_modules": sorted(m for m in ("pandas", "plotly", "google.generativeai", "numpy",
+                                                      "pdfplumber", "fpdf", "requests") if m in sys.modules)}))
+"""
+
+def slowest_imports(stderr, top):
+    """(cumulative microseconds, module) of the top-level imports made after the script started."""
+    rows = []
+    started = False
+    for line in stderr.splitlines():
+        if line.startswith("@@script-start"):
+            started = True
+            continue
+        if not started or not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # the header line
+        # Top-level entries have exactly one space before the module name
+        if not name.startswith("  "):
+            rows.append((cumulative, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def run_once(importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    done = subprocess.run(command, capture_output=True, text=True, cwd=os.getcwd())
+    if done.returncode:
+        raise RuntimeError(done.stderr[-2000:])
+    return json.loads(done.stdout.strip().splitlines()[-1]), done.stderr
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=3, help="cold processes to start")
+    arg_parser.add_argument("--importtime", action="store_true", help="list the slowest imports of the script run")
+    arg_parser.add_argument("--top", type=int, default=15)
+    args = arg_parser.parse_args()
+
+    firsts = []
+    for n in range(args.runs):
+        timings, _ = run_once()
+        firsts.append(timings["first_run"])
+        print(f"run {n + 1}: first script run {timings['first_run'] * 1000:.0f} ms, "
+              f"rerun {timings['rerun'] * 1000:.0f} ms")
+    print(f"best cold first run: {min(firsts) * 1000:.0f} ms")
+    if timings["exceptions"]:
+        print(f"the landing page raised: {timings['exceptions']}")
+    print(f"heavy modules loaded by the landing page: {', '.join(timings['heavy_modules']) or 'none'}")
+
+    if args.importtime:
+        _, stderr = run_once(importtime=True)
+        print(f"\nslowest imports during the first script run (cumulative):")
+        for micros, name in slowest_imports(stderr, args.top):
+            print(f"  {micros / 1000:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
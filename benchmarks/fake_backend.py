@@ -0,0 +1,154 @@
+"""
+Local stand-in for the Gemini model, for benchmarks and offline runs.
+
+Answers single-clause and batch prompts with well-formed analyses (and
+summary prompts with a line of text) after a simulated latency, and fails a
+configurable share of calls with transient API errors or malformed replies,
+so retries, repairs, re-asks and fallbacks get exercised. Half of the
+malformed replies are cut off; the rest are wrapped in prose or written with
+Python-style quotes and a trailing comma. stream=True returns the reply in
+chunks spread over the latency, like the real streaming API.
+
+    risk_analyzer.set_model(FakeModel(latency=0.8, jitter=0.3, error_rate=0.02))
+    python batch_audit.py contracts/ --backend benchmarks.fake_backend:from_env
+
+from_env() reads FAKE_LATENCY, FAKE_JITTER, FAKE_ERROR_RATE, FAKE_MALFORMED_RATE,
+FAKE_SEED and FAKE_QUOTA_RPM.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+from google.api_core import exceptions as api_exceptions
+
+# Batch prompts list every clause on its own line as "[id] text"
+_BATCH_ITEM = re.compile(r"^\s*\[(\d+)\] ", re.M)
+_CLAUSE = re.compile(r"Clause: (.*?)\n\s*Return the response", re.S)
+RISKS = ("High", "Medium", "Low")
+# Streamed replies come in pieces of this many characters; the first one
+# after FIRST_CHUNK_SHARE of the latency, the rest spread over the remainder
+STREAM_CHUNK_CHARS = 40
+FIRST_CHUNK_SHARE = 0.3
+
+def fake_analysis(text):
+    """The analysis the fake gives a clause; the same clause always gets the same answer."""
+    risk = RISKS[zlib.crc32(" ".join(text.split()).encode("utf-8")) % len(RISKS)]
+    return {"risk": risk,
+            "explanation": f"Simulated {risk.lower()} risk assessment of a {len(text)}-character clause.",
+            "suggestion": "Simulated suggestion: review the obligations and caps in this clause."}
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+class FakeResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        # About four characters per token, like analysis_engine.estimate_tokens
+        self.usage_metadata = FakeUsage(len(prompt) // 4, len(text) // 4)
+
+class FakeStream:
+    """Streamed reply: iterating yields chunks with .text; .text and .usage_metadata are the whole reply's."""
+    def __init__(self, text, prompt, delay):
+        self.text = text
+        self.usage_metadata = FakeResponse(text, prompt).usage_metadata
+        self._delay = delay
+
+    def __iter__(self):
+        pieces = [self.text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(self.text), STREAM_CHUNK_CHARS)]
+        pause = self._delay / max(1, len(pieces) - 1)
+        for n, piece in enumerate(pieces):
+            if n:
+                time.sleep(pause)
+            yield FakeResponse(piece, "")
+
+def malformed(text, draw):
+    """text spoiled the way models spoil JSON replies; draw in [0, 1) picks how."""
+    if draw < 0.5:
+        # Cut off mid-object, like a truncated generation
+        return text[:len(text) // 2]
+    if draw < 0.75:
+        return f"Here is the analysis you asked for:\n{text}\nLet me know if you need anything else."
+    return re.sub(r"\s*([}\]])\s*\Z", r",\n\1", text.replace('"', "'"))
+
+class FakeModel:
+    """
+    generate_content() compatible fake. latency and jitter are in seconds
+    (each call sleeps a normal draw, at least zero); error_rate and
+    malformed_rate are per-call probabilities. With quota_rpm, calls beyond
+    that many in the last minute get a 429 like the real API. Thread-safe.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, malformed_rate=0.0, seed=0, quota_rpm=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.quota_rpm = quota_rpm
+        self.calls = 0
+        self.rate_limited = 0
+        self._recent = deque()  # times of the calls accepted in the last minute
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _over_quota(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] < now - 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.quota_rpm:
+                self.rate_limited += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            return delay, self._rng.random(), self._rng.random(), self._rng.random()
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        if self.quota_rpm and self._over_quota():
+            raise api_exceptions.TooManyRequests("Simulated quota exceeded")
+        delay, error_draw, malformed_draw, defect_draw = self._draw()
+        # A stream starts after part of the latency and spends the rest delivering chunks
+        time.sleep(delay * FIRST_CHUNK_SHARE if stream else delay)
+        if error_draw < self.error_rate:
+            raise api_exceptions.ServiceUnavailable("Simulated overload")
+        text = self._reply(prompt, malformed_draw, defect_draw)
+        if stream:
+            return FakeStream(text, prompt, delay * (1 - FIRST_CHUNK_SHARE))
+        return FakeResponse(text, prompt)
+
+    def _reply(self, prompt, malformed_draw, defect_draw):
+        ids = [int(clause_id) for clause_id in _BATCH_ITEM.findall(prompt)]
+        if "JSON" not in prompt:
+            # Summaries and notes are plain text
+            return f"- Simulated summary of a {len(prompt)}-character prompt."
+        if ids:
+            # The last clause ends where the instructions after the list start
+            clause_list = prompt.split("Return the response", 1)[0]
+            bodies = [body.strip() for body in re.split(r"^\s*\[\d+\] ", clause_list, flags=re.M)[1:]]
+            text = json.dumps([{"id": clause_id, **fake_analysis(body)} for clause_id, body in zip(ids, bodies)],
+                              ensure_ascii=False, indent=2)
+        else:
+            match = _CLAUSE.search(prompt)
+            text = json.dumps(fake_analysis(match.group(1) if match else prompt), ensure_ascii=False, indent=2)
+        if malformed_draw < self.malformed_rate:
+            text = malformed(text, defect_draw)
+        return f"```json\n{text}\n```"
+
+def from_env():
+    """FakeModel configured from FAKE_* environment variables (for --backend)."""
+    return FakeModel(latency=float(os.environ.get("FAKE_LATENCY", 0)),
+                     jitter=float(os.environ.get("FAKE_JITTER", 0)),
+                     error_rate=float(os.environ.get("FAKE_ERROR_RATE", 0)),
+                     malformed_rate=float(os.environ.get("FAKE_MALFORMED_RATE", 0)),
+                     seed=int(os.environ.get("FAKE_SEED", 0)),
+                     quota_rpm=int(os.environ.get("FAKE_QUOTA_RPM", 0)))
@@ -0,0 +1,149 @@
+"""
+Synthetic contracts for benchmarks: numbered clauses in English, Unicode
+Hindi or Kruti Dev (legacy-encoded Hindi), written as TXT, DOCX or PDF.
+
+Run from the repository root to write a sample set:
+    python -m benchmarks.synthetic_contracts --out .cache/synthetic --clauses 50 200
+"""
+import argparse
+import os
+import random
+
+import docx
+from fpdf import FPDF
+
+from report_generator import find_devanagari_font
+
+LANGUAGES = ("english", "hindi", "kruti")
+FORMATS = ("txt", "docx", "pdf")
+
+# Clause bodies; {party}, {amount}, {days} and {city} are filled in per clause
+ENGLISH_CLAUSES = [
+    "The Tenant shall pay a monthly rent of Rs. {amount} to {party} on or before the fifth day of each month.",
+    "Either party may terminate this Agreement by giving {days} days written notice to the other party.",
+    "The Employee shall indemnify and hold harmless {party} against any loss, damage or liability arising "
+    "from the Employee's negligence.",
+    "A late payment shall attract interest at 18% per annum and a penalty of Rs. {amount} per day of delay.",
+    "Any dispute arising out of this Agreement shall be referred to arbitration at {city}, and the courts at "
+    "{city} shall have exclusive jurisdiction.",
+    "The Employee shall not, for a period of {days} days after leaving, join any competitor of {party}.",
+    "The security deposit of Rs. {amount} shall be forfeited if the premises are vacated without notice.",
+    "This Agreement is made at {city} between {party} and the other party named in the schedule.",
+    "Headings are for convenience only and shall not affect the interpretation of this Agreement.",
+    "The parties shall keep all information received under this Agreement confidential.",
+    "{party} may revise the fees at its sole discretion, and such revision shall be binding and irrevocable.",
+    "In witness whereof the parties have signed this Agreement at {city} in the presence of two witnesses.",
+]
+HINDI_CLAUSES = [
+    "किरायेदार प्रत्येक माह की पाँच तारीख तक {party} को रु. {amount} किराया भुगतान करेगा।",
+    "कोई भी पक्षकार {days} दिन की लिखित सूचना देकर इस करार को समाप्त कर सकता है।",
+    "विलंब से भुगतान होने पर प्रतिदिन रु. {amount} का जुर्माना देय होगा।",
+    "इस करार से उत्पन्न किसी भी विवाद का निर्णय {city} के न्यायालय द्वारा किया जायेगा।",
+    "कर्मचारी किसी भी हानि या नुकसान के लिए {party} की क्षतिपूर्ति करेगा।",
+    "फर्म का मुख्य कार्यालय {city} नगर में होगा।",
+    "यह करार {city} में {party} तथा अनुसूची में वर्णित पक्षकार के बीच निष्पादित किया गया।",
+    "दोनों पक्षकारों ने साक्षियों के समक्ष हस्ताक्षर किये।",
+]
+# Kruti Dev sentences built from hindi_fixer.WORD_MAP words, so they convert cleanly
+KRUTI_CLAUSES = [
+    "QeZ dk eq[; dk;kZy; uxj esa gksxk",
+    "lHkh i{kdkj ykHkksa vkSj gkfu dk cjkcj&cjkcj ogu djsaxs",
+    "izca/kd QeZ ds fy, cSad [kkrk [kksysxk",
+    "okn&fookn mRiUu gks ij iapksa dk fu.kZ; ck/;dkjh gksxk",
+    "izFke i{kdkj dks dksbZ ikfjJfed ugha fn; tk,xk",
+    "foRrh; o\"kZ vizSy ls ekpZ rd gksxk",
+    "dqy iwath :- {amount} ftlesa rhuksa i{kdkj cjkcj va'knku djsaxs",
+    "nqjkpj.k ls Hkkfxrk dk fo?kVu gks ldsxk",
+]
+PARTIES = ["Sharma Traders", "Verma Estates", "Gupta & Sons", "Iyer Logistics", "Khan Textiles"]
+CITIES = ["Jaipur", "Indore", "Lucknow", "Pune", "Patna"]
+
+_DEVANAGARI_DIGITS = str.maketrans("0123456789", "०१२३४५६७८९")
+
+def contract_text(language="english", clauses=50, seed=0):
+    """A contract of `clauses` numbered clauses; Hindi is numbered in Devanagari digits like real deeds."""
+    rng = random.Random(seed)
+    templates = {"english": ENGLISH_CLAUSES, "hindi": HINDI_CLAUSES, "kruti": KRUTI_CLAUSES}[language]
+
+    def sentence():
+        values = {"{party}": rng.choice(PARTIES), "{city}": rng.choice(CITIES),
+                  "{amount}": f"{rng.randint(1, 99)},{rng.randint(100, 999)}",
+                  "{days}": str(rng.choice((15, 30, 60, 90)))}
+        # Plain replace, not str.format: Kruti Dev text uses { and } as letters
+        text = rng.choice(templates)
+        for placeholder, value in values.items():
+            text = text.replace(placeholder, value)
+        return text
+
+    lines = []
+    for n in range(1, clauses + 1):
+        body = sentence()
+        # Longer clauses now and then, so batching and wrapping see realistic sizes
+        if rng.random() < 0.2:
+            body = f"{body} {sentence()}"
+        if language == "hindi":
+            lines.append(f"{str(n).translate(_DEVANAGARI_DIGITS)}. {body}")
+        elif language == "kruti":
+            lines.append(f"{n}- {body}")  # Kruti Dev types the full stop as '-'
+        else:
+            lines.append(f"{n}. {body}")
+    return "\n".join(lines) + "\n"
+
+def write_txt(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def write_docx(path, text):
+    document = docx.Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    document.save(path)
+
+def write_pdf(path, text, unicode_text=False):
+    """Writes text as a PDF; Hindi text needs a Devanagari TTF font (see report_generator.find_devanagari_font)."""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    if unicode_text:
+        font = find_devanagari_font()
+        if font is None:
+            raise RuntimeError("no Devanagari TTF font found for a Hindi PDF (install fonts-noto-core or set REPORT_FONT_PATH)")
+        pdf.add_font("Synthetic", "", font[0], uni=True)
+        pdf.set_font("Synthetic", size=11)
+    else:
+        pdf.set_font("Helvetica", size=11)
+    pdf.add_page()
+    for line in text.splitlines():
+        pdf.multi_cell(0, 6, line if unicode_text else line.encode("latin-1", "replace").decode("latin-1"))
+    pdf.output(path)
+
+def write_contract(directory, language="english", fmt="txt", clauses=50, seed=0):
+    """Writes one synthetic contract and returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{language}-{clauses}.{fmt}")
+    text = contract_text(language, clauses, seed)
+    if fmt == "txt":
+        write_txt(path, text)
+    elif fmt == "docx":
+        write_docx(path, text)
+    else:
+        write_pdf(path, text, unicode_text=language == "hindi")
+    return path
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--out", default=os.path.join(".cache", "synthetic"))
+    arg_parser.add_argument("--clauses", type=int, nargs="+", default=[50])
+    arg_parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=list(LANGUAGES))
+    arg_parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    args = arg_parser.parse_args()
+
+    for clauses in args.clauses:
+        for language in args.languages:
+            for fmt in args.formats:
+                try:
+                    print(write_contract(args.out, language, fmt, clauses))
+                except RuntimeError as e:
+                    print(f"skipped {language} {fmt}: {e}")
+
+if __name__ == "__main__":
+    main()
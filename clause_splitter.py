@@ -1,16 +1,143 @@
 import re
+from bisect import bisect_right
 
-def split_clauses(text):
-    # Regex explanations:
-    # \n\d+\.       -> Matches English numbering (e.g., "1.")
-    # \n[१-९]+\.    -> Matches Hindi numbering (e.g., "१.")
-    # \n[A-Z\u0900-\u097F]+: -> Matches Headers in English or Hindi ending with ':'
-    # \([a-z]\)     -> Matches sub-clauses like "(a)", "(b)"
-    
-    pattern = r'\n\d+\.|\n[१-९]+\.|\n[A-Z\u0900-\u097F ]+:|\n\([a-z]\)'
-    
-    clauses = re.split(pattern, text)
-    
-    # Filter out empty strings or very short fragments (less than 10 chars)
-    # This removes noise like page numbers or header fragments
-    return [c.strip() for c in clauses if len(c.strip()) > 10]
\ No newline at end of file
+from instrumentation import timed
+
+# Regex explanations:
+# \n\d+\.       -> Matches English numbering (e.g., "1.")
+# \n[१-९]+\.    -> Matches Hindi numbering (e.g., "१.")
+# \n[A-Z\u0900-\u097F]+: -> Matches Headers in English or Hindi ending with ':'
+# \([a-z]\)     -> Matches sub-clauses like "(a)", "(b)"
+# Each alternative captures its label, so the numbering is kept, not thrown away.
+CLAUSE_PATTERN = re.compile(r'\n(?:(\d+)\.|([१-९]+)\.|([A-Z\u0900-\u097F ]+):|(\([a-z]\)))')
+
+# Nesting level of each kind of marker (the text before the first marker is level 0)
+HEADING, NUMBERED, SUBCLAUSE = 0, 1, 2
+_MARKER_LEVELS = (NUMBERED, NUMBERED, HEADING, SUBCLAUSE)
+
+_FIRST_CHAR = re.compile(r'\S')
+_LAST_CHAR = re.compile(r'\S\s*\Z')
+
+# Filter out very short fragments (10 chars or fewer)
+# This removes noise like page numbers or header fragments
+MIN_CLAUSE_CHARS = 11
+
+class Clause:
+    """
+    One clause as offsets into the text it was split from. The text itself is
+    only sliced out when .text is read, so an index of thousands of clauses
+    holds no copies of the document.
+    """
+    __slots__ = ("_source", "_base", "start", "end", "label", "level", "parent", "page")
+
+    def __init__(self, source, base, start, end, label, level, parent, page):
+        self._source = source    # the text (or streamed chunk) the offsets point into
+        self._base = base        # document offset of _source[0]
+        self.start = start       # document offsets of the stripped clause text
+        self.end = end
+        self.label = label       # "7", "(b)", "TERMINATION", or None before the first marker
+        self.level = level       # HEADING, NUMBERED or SUBCLAUSE
+        self.parent = parent     # label of the enclosing numbered clause, for sub-clauses
+        self.page = page         # 1-based page the clause starts on, if known
+
+    @property
+    def text(self):
+        return self._source[self.start - self._base:self.end - self._base]
+
+    @property
+    def ref(self):
+        """Citation such as "7", "7(b)" or "TERMINATION"."""
+        if self.level == SUBCLAUSE and self.parent:
+            return f"{self.parent}{self.label}"
+        return self.label
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Clause(ref={self.ref!r}, page={self.page}, start={self.start}, end={self.end})"
+
+def _scan(source, base, markers, page_of, state):
+    """
+    Yields a Clause for every span between consecutive clause markers in
+    source. markers are CLAUSE_PATTERN matches on source; state carries the
+    label/level of the open clause and the current parent across calls.
+    """
+    position = state["position"] - base
+    for marker in markers:
+        clause = _make_clause(source, base, position, marker.start(), page_of, state)
+        if clause:
+            yield clause
+        kind = marker.lastindex - 1
+        state["label"] = marker.group(marker.lastindex).strip()
+        state["level"] = _MARKER_LEVELS[kind]
+        if state["level"] == NUMBERED:
+            state["parent"] = state["label"]
+        elif state["level"] == HEADING:
+            state["parent"] = None
+        position = marker.end()
+    state["position"] = base + position
+
+def _make_clause(source, base, start, end, page_of, state):
+    first = _FIRST_CHAR.search(source, start, end)
+    if not first:
+        return None
+    last = _LAST_CHAR.search(source, first.start(), end)
+    start, end = first.start(), last.start() + 1
+    if end - start < MIN_CLAUSE_CHARS:
+        return None
+    parent = state["parent"] if state["level"] == SUBCLAUSE else None
+    return Clause(source, base, base + start, base + end, state["label"],
+                  state["level"], parent, page_of(base + start))
+
+def _new_state():
+    return {"position": 0, "label": None, "level": HEADING, "parent": None}
+
+@timed("split_clauses")
+def split_clauses(text, page_starts=None):
+    """
+    Splits text into an index of Clause records in one scan.
+    page_starts optionally lists the offset at which each page begins
+    (page 1 first), so every clause knows the page it starts on.
+    """
+    page_of = (lambda offset: bisect_right(page_starts, offset)) if page_starts else (lambda offset: None)
+    state = _new_state()
+    clauses = list(_scan(text, 0, CLAUSE_PATTERN.finditer(text), page_of, state))
+    final = _make_clause(text, 0, state["position"], len(text), page_of, state)
+    return clauses + [final] if final else clauses
+
+def iter_clauses(pages):
+    """
+    Incremental split_clauses() over an iterable of (page_number, text) pairs
+    (joined with newlines, like extract_text). Each clause is yielded as soon as
+    the next clause marker has been read, so analysis can start while pages are
+    parsed. Offsets are relative to that joined text.
+    """
+    page_starts, page_numbers = [], []
+    def page_of(offset):
+        return page_numbers[bisect_right(page_starts, offset) - 1]
+
+    state = _new_state()
+    buffer, base, length = "", 0, 0
+    for page_number, page in pages:
+        # Only the joining newline onwards can hold markers not seen yet
+        scan_from = length
+        if page_starts:
+            page = "\n" + page
+        page_starts.append(length + 1 if page_starts else 0)
+        page_numbers.append(page_number)
+        buffer += page
+        length += len(page)
+
+        markers = list(CLAUSE_PATTERN.finditer(buffer, max(scan_from, state["position"]) - base))
+        # Clauses before the last marker are final; the rest may still grow
+        if markers:
+            yield from _scan(buffer, base, markers, page_of, state)
+            buffer = buffer[state["position"] - base:]
+            base = state["position"]
+    final = _make_clause(buffer, base, state["position"] - base, len(buffer), page_of, state)
+    if final:
+        yield final
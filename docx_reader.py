@@ -0,0 +1,285 @@
+import re
+import zipfile
+from xml.etree.ElementTree import fromstring
+from xml.parsers import expat
+
+# DOCX text without python-docx: word/document.xml is streamed out of the
+# zip through an expat parser, which builds no element tree at all; only the
+# paragraph being read is held, so memory stays flat however long the
+# document is, and embedded media are never read. Unlike python-docx's
+# doc.paragraphs, this keeps tables (one line per row), headers and footers,
+# and the labels Word draws for numbered lists ("7.", "(b)"), which the
+# clause splitter needs.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Table rows become one line, cells separated like this
+CELL_SEPARATOR = " | "
+# Lines are handed on in chunks of about this many characters
+CHUNK_CHARS = 64 * 1024
+# Bytes of XML decompressed and parsed at a time
+READ_BYTES = 256 * 1024
+
+# Element names as expat reports them: namespace URI, "}", local name
+_NS = W[1:]
+_P, _T, _PPR, _TC, _TR, _VAL = (_NS + name for name in ("p", "t", "pPr", "tc", "tr", "val"))
+_NUMBERING_PROPS = {_NS + "numId": "num_id", _NS + "ilvl": "ilvl", _NS + "pStyle": "style"}
+_RUN_TEXT = {_NS + "tab": "\t", _NS + "br": "\n", _NS + "cr": "\n", _NS + "noBreakHyphen": "-"}
+# Content that is not shown: deleted and moved-away runs, field codes, tracked
+# property changes, and the old-Word fallback copies of text boxes
+_SKIPPED = {_NS + name for name in ("del", "moveFrom", "instrText", "delInstrText", "pPrChange", "rPrChange")}
+_SKIPPED.add("http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback")
+# Most elements are run formatting; these are the only ones the reader acts on
+_STARTS = {_T, _P, _PPR, _TC, _TR, *_RUN_TEXT, *_NUMBERING_PROPS, *_SKIPPED}
+_ENDS = {_T, _P, _PPR, _TC, _TR}
+# "%2" in a level's text stands for the number of level 2
+_LEVEL_NUMBER = re.compile(r"%(\d)")
+
+_ROMAN = ((1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+          (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i"))
+_DEVANAGARI_DIGITS = str.maketrans("0123456789", "०१२३४५६७८९")
+
+def _roman(n):
+    out = ""
+    for value, letters in _ROMAN:
+        while n >= value:
+            out += letters
+            n -= value
+    return out
+
+def _letters(n):
+    # Word counts a..z, then aa..zz, then aaa..
+    return chr(ord("a") + (n - 1) % 26) * ((n - 1) // 26 + 1) if n > 0 else ""
+
+_FORMATS = {
+    "decimal": str,
+    "decimalZero": lambda n: f"{n:02d}",
+    "lowerLetter": _letters,
+    "upperLetter": lambda n: _letters(n).upper(),
+    "lowerRoman": _roman,
+    "upperRoman": lambda n: _roman(n).upper(),
+    "hindiNumbers": lambda n: str(n).translate(_DEVANAGARI_DIGITS),
+}
+
+def _val(elem, path):
+    found = elem.find(path)
+    return None if found is None else found.get(W + "val")
+
+class Numbering:
+    """List definitions from numbering.xml and styles.xml, and the counters of the lists met so far."""
+    def __init__(self, numbering_root=None, styles_root=None):
+        self.levels = {}          # abstractNumId -> {ilvl: (start, numFmt, lvlText)}
+        self.nums = {}            # numId -> (abstractNumId, {ilvl: startOverride})
+        self.styles = {}          # styleId -> (numId, ilvl, basedOn)
+        if numbering_root is not None:
+            for abstract in numbering_root.iter(W + "abstractNum"):
+                self.levels[abstract.get(W + "abstractNumId")] = {
+                    int(lvl.get(W + "ilvl", 0)): (int(_val(lvl, W + "start") or 1), _val(lvl, W + "numFmt") or "decimal",
+                                                  _val(lvl, W + "lvlText") or "")
+                    for lvl in abstract.iter(W + "lvl")}
+            for num in numbering_root.iter(W + "num"):
+                overrides = {int(override.get(W + "ilvl", 0)): int(_val(override, W + "startOverride"))
+                             for override in num.iter(W + "lvlOverride") if _val(override, W + "startOverride")}
+                self.nums[num.get(W + "numId")] = (_val(num, W + "abstractNumId"), overrides)
+        if styles_root is not None:
+            for style in styles_root.iter(W + "style"):
+                self.styles[style.get(W + "styleId")] = (_val(style, f"{W}pPr/{W}numPr/{W}numId"),
+                                                         _val(style, f"{W}pPr/{W}numPr/{W}ilvl"),
+                                                         _val(style, W + "basedOn"))
+        self.reset()
+
+    def reset(self):
+        """Starts every list afresh (each document part counts on its own)."""
+        self.counters = {}        # abstractNumId -> {ilvl: last number drawn}
+        self.started = set()      # numIds whose start overrides have been applied
+
+    def _style_numbering(self, style_id):
+        seen = set()
+        while style_id in self.styles and style_id not in seen:
+            seen.add(style_id)
+            num_id, ilvl, based_on = self.styles[style_id]
+            if num_id is not None:
+                return num_id, ilvl
+            style_id = based_on
+        return None, None
+
+    def label(self, num_id=None, ilvl=None, style=None):
+        """The list label Word draws before a paragraph with these properties, e.g. "7." or "(b)", or ""."""
+        if num_id is None and style is not None:
+            style_num_id, style_ilvl = self._style_numbering(style)
+            num_id, ilvl = style_num_id, ilvl or style_ilvl
+        if num_id is None or num_id not in self.nums:
+            return ""  # not numbered, or numId 0: numbering switched off
+        abstract_id, overrides = self.nums[num_id]
+        levels = self.levels.get(abstract_id, {})
+        ilvl = int(ilvl or 0)
+        if ilvl not in levels:
+            return ""
+        counters = self.counters.setdefault(abstract_id, {})
+        if num_id not in self.started:
+            self.started.add(num_id)
+            for level, start in overrides.items():
+                counters[level] = start - 1
+        counters[ilvl] = counters.get(ilvl, levels[ilvl][0] - 1) + 1
+        for deeper in [level for level in counters if level > ilvl]:
+            del counters[deeper]
+
+        def number(match):
+            level = int(match.group(1)) - 1
+            start, number_format, _ = levels.get(level, (1, "decimal", ""))
+            return _FORMATS.get(number_format, str)(counters.get(level, start))
+
+        _, number_format, text = levels[ilvl]
+        if number_format in ("bullet", "none"):
+            return ""
+        return _LEVEL_NUMBER.sub(number, text)
+
+class _PartReader:
+    """expat handlers that turn one WordprocessingML part into lines, holding only the open paragraph."""
+    def __init__(self, numbering):
+        self.numbering = numbering
+        self.lines = []        # finished lines not handed on yet
+        self.text = None       # text pieces of the open paragraph, None outside paragraphs
+        self.props = {}        # numId, ilvl and pStyle of the open paragraph
+        self.outer = []        # (text, props) of paragraphs around a text box's paragraphs
+        self.cells = []        # text pieces of each open table cell, innermost last
+        self.rows = []         # cell texts of each open table row, innermost last
+        self.in_text = False
+        self.in_props = False
+        self.skip = 0          # depth inside content that is not shown
+
+    def start(self, name, attrs):
+        if self.skip:
+            self.skip += 1
+        elif name not in _STARTS:
+            return
+        elif name == _T:
+            self.in_text = True
+        elif name in _RUN_TEXT:
+            if self.text is not None and not self.in_props:
+                self.text.append(_RUN_TEXT[name])
+        elif name == _P:
+            self.outer.append((self.text, self.props))
+            self.text, self.props = [], {}
+        elif name == _PPR:
+            self.in_props = True
+        elif self.in_props and name in _NUMBERING_PROPS:
+            self.props[_NUMBERING_PROPS[name]] = attrs.get(_VAL)
+        elif name in _SKIPPED:
+            self.skip = 1
+        elif name == _TC:
+            self.cells.append([])
+        elif name == _TR:
+            self.rows.append([])
+
+    def end(self, name):
+        if self.skip:
+            self.skip -= 1
+        elif name not in _ENDS:
+            return
+        elif name == _T:
+            self.in_text = False
+        elif name == _PPR:
+            self.in_props = False
+        elif name == _P:
+            text = "".join(self.text)
+            label = self.numbering.label(**self.props) if self.props else ""
+            self.text, self.props = self.outer.pop()
+            line = f"{label} {text}" if label and text else text
+            if not self.cells:
+                self.lines.append(line)
+            elif line.strip():
+                self.cells[-1].append(line.strip())
+        elif name == _TC:
+            pieces = self.cells.pop()
+            if self.rows:
+                self.rows[-1].append(" ".join(pieces))
+        elif name == _TR:
+            line = CELL_SEPARATOR.join(cell for cell in self.rows.pop() if cell)
+            if self.cells:
+                if line:
+                    self.cells[-1].append(line)
+            elif line:
+                self.lines.append(line)
+
+    def characters(self, data):
+        if self.in_text and self.text is not None:
+            self.text.append(data)
+
+def _part_lines(source, numbering):
+    """
+    Lines of one WordprocessingML part (the body, a header or a footer),
+    streamed: a line per paragraph, and per table row with its cells' text.
+    """
+    reader = _PartReader(numbering)
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    parser.CharacterDataHandler = reader.characters
+    while True:
+        data = source.read(READ_BYTES)
+        parser.Parse(data, not data)
+        yield from reader.lines
+        reader.lines.clear()
+        if not data:
+            return
+
+def _read_part(archive, name):
+    try:
+        return fromstring(archive.read(name))
+    except KeyError:
+        return None
+
+def _header_footer_parts(archive):
+    """Names of the header and footer parts, in part order (header1.xml, header2.xml, ...)."""
+    rels = _read_part(archive, "word/_rels/document.xml.rels")
+    parts = {"header": [], "footer": []}
+    for rel in ([] if rels is None else rels.iter(_REL + "Relationship")):
+        kind = rel.get("Type", "").rsplit("/", 1)[-1]
+        if kind in parts:
+            target = rel.get("Target", "")
+            parts[kind].append(target.lstrip("/") if target.startswith("/") else "word/" + target)
+    natural = lambda name: [int(piece) if piece.isdigit() else piece for piece in re.split(r"(\d+)", name)]
+    return sorted(parts["header"], key=natural), sorted(parts["footer"], key=natural)
+
+def _iter_lines(archive):
+    numbering = Numbering(_read_part(archive, "word/numbering.xml"), _read_part(archive, "word/styles.xml"))
+    headers, footers = _header_footer_parts(archive)
+
+    def repeated_parts(names):
+        # Sections often repeat the same header; each distinct one is kept once
+        seen = set()
+        for name in names:
+            if name not in archive.NameToInfo:
+                continue
+            numbering.reset()
+            with archive.open(name) as source:
+                lines = tuple(line for line in _part_lines(source, numbering) if line.strip())
+            if lines and lines not in seen:
+                seen.add(lines)
+                yield from lines
+
+    yield from repeated_parts(headers)
+    numbering.reset()
+    with archive.open("word/document.xml") as source:
+        yield from _part_lines(source, numbering)
+    yield from repeated_parts(footers)
+
+def iter_docx_text(file, chunk_chars=CHUNK_CHARS):
+    """
+    Yields the text of a DOCX file (a path or binary file object) in
+    document order: headers, body, footers. Chunks hold whole lines and
+    should be joined with newlines; each is about chunk_chars characters.
+    """
+    with zipfile.ZipFile(file) as archive:
+        lines, size = [], 0
+        for line in _iter_lines(archive):
+            lines.append(line)
+            size += len(line) + 1
+            if size >= chunk_chars:
+                yield "\n".join(lines)
+                lines, size = [], 0
+        if lines:
+            yield "\n".join(lines)
@@ -0,0 +1,241 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Low-overhead stage timers and counters. Every span and counter goes to the
+# process-wide METRICS, and also to the Metrics of the current recording()
+# (one audit), if any. Spans record exclusive time: a span nested in another
+# on the same thread is subtracted from its parent, so streamed stages
+# (parsing inside splitting inside analysis) are not counted twice.
+# With CONTRACT_METRICS=0, or after enable(False), spans are a shared no-op
+# for the whole process; recording(collect=False) turns them off for one audit.
+_enabled = os.environ.get("CONTRACT_METRICS", "1") != "0"
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_PREFIX = "contract_insight"
+
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+_collect = contextvars.ContextVar("metrics_collect", default=True)
+_local = threading.local()
+
+class Metrics:
+    """Thread-safe stage timings (count, total, max, histogram), named counters and gauges."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}     # name -> [count, seconds, max_seconds, bucket counts]
+        self.counters = {}
+        self.gauges = {}     # name -> last value set
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = [0, 0.0, 0.0, [0] * len(BUCKETS)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry[3][i] += 1
+                    break
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def merge(self, snapshot):
+        """Adds a to_dict() snapshot, e.g. one sent back by a worker process."""
+        with self._lock:
+            for stage, data in snapshot.get("stages", {}).items():
+                entry = self.stages.setdefault(stage, [0, 0.0, 0.0, [0] * len(BUCKETS)])
+                entry[0] += data["count"]
+                entry[1] += data["seconds"]
+                entry[2] = max(entry[2], data["max_seconds"])
+                entry[3] = [a + b for a, b in zip(entry[3], data["buckets"])]
+            for name, amount in snapshot.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            # Gauges from several processes are summed (queue depths add up)
+            for name, value in snapshot.get("gauges", {}).items():
+                self.gauges[name] = self.gauges.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "stages": {stage: {"count": count, "seconds": round(seconds, 6),
+                                   "max_seconds": round(max_seconds, 6), "buckets": list(buckets)}
+                           for stage, (count, seconds, max_seconds, buckets) in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": dict(sorted(self.gauges.items())),
+            }
+
+    def to_json(self):
+        return json.dumps({"buckets": BUCKETS, **self.to_dict()}, indent=2)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Prometheus text exposition format (a histogram per stage, a counter per count)."""
+        snapshot = self.to_dict()
+        name = f"{prefix}_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each pipeline stage (exclusive of nested stages).",
+                 f"# TYPE {name} histogram"]
+        for stage, data in snapshot["stages"].items():
+            cumulative = 0
+            for bound, in_bucket in zip(BUCKETS, data["buckets"]):
+                cumulative += in_bucket
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {data["seconds"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {data["count"]}')
+        for counter, value in snapshot["counters"].items():
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value}")
+        for gauge, value in snapshot["gauges"].items():
+            lines.append(f"# TYPE {prefix}_{gauge} gauge")
+            lines.append(f"{prefix}_{gauge} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes Prometheus text (or JSON for a .json path) atomically, for textfile collectors."""
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_json() if path.endswith(".json") else self.to_prometheus())
+        os.replace(temp_path, path)
+
+# Process-wide totals since start-up
+METRICS = Metrics()
+
+def enabled():
+    return _enabled
+
+def enable(flag=True):
+    """Process-wide switch, for the server or a batch run; see recording() for one audit."""
+    global _enabled
+    _enabled = bool(flag)
+
+def _collecting():
+    return _enabled and _collect.get()
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+class _Span:
+    __slots__ = ("name", "start", "nested")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        _stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+        if stack:
+            stack[-1].nested += elapsed
+        seconds = elapsed - self.nested
+        METRICS.observe(self.name, seconds)
+        run = _current_run.get()
+        if run is not None:
+            run.observe(self.name, seconds)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name):
+    """Context manager timing one call of a stage."""
+    return _Span(name) if _collecting() else _NO_SPAN
+
+def count(name, amount=1):
+    """Adds to a named counter (prompt sizes, retries, cache hits...)."""
+    if not _collecting():
+        return
+    METRICS.add(name, amount)
+    run = _current_run.get()
+    if run is not None:
+        run.add(name, amount)
+
+def gauge(name, value):
+    """Sets a process-wide gauge (queue depth, current rate...); gauges are not per audit."""
+    if _enabled:
+        METRICS.set_gauge(name, value)
+
+def timed(stage):
+    """Decorator: times every call of the function as a span of `stage`."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _collecting():
+                return function(*args, **kwargs)
+            with _Span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def timed_iter(stage, iterable):
+    """Yields from iterable, timing the work done to produce each item as a span of `stage`."""
+    if not _collecting():
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with _Span(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def stage_summary(snapshot):
+    """Table rows (one per stage) of a to_dict() snapshot, slowest stage first."""
+    rows = [{"stage": stage, "calls": data["count"], "total_s": round(data["seconds"], 3),
+             "mean_ms": round(data["seconds"] / data["count"] * 1000, 2) if data["count"] else 0.0,
+             "max_ms": round(data["max_seconds"] * 1000, 2)}
+            for stage, data in snapshot["stages"].items()]
+    return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+@contextmanager
+def recording(collect=True):
+    """
+    Collects the spans and counters of one audit into a fresh Metrics, in
+    addition to METRICS. Worker threads join in when their tasks are run
+    in a copy of this context (see analysis_engine). With collect=False the
+    audit records nothing, here or in METRICS, and other audits are unaffected.
+    """
+    run = Metrics()
+    token = _current_run.set(run)
+    collect_token = _collect.set(collect)
+    try:
+        yield run
+    finally:
+        _collect.reset(collect_token)
+        _current_run.reset(token)
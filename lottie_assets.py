@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+
+# Landing page animations. A page render never waits on the network: files
+# bundled in assets/lottie/ are used first, then copies cached by an earlier
+# download. Anything missing is fetched once per process in the background
+# (the page shows its static fallback meanwhile), and the download is kept
+# for the next start. CONTRACT_OFFLINE=1 skips the download entirely.
+LOTTIE_URLS = {
+    # 3D Legal Scale Character
+    "main_char": "https://lottie.host/82823654-e403-4c91-9e73-982d1c60a87a/7xYpX4mQ6J.json",
+    # 3D Security Shield
+    "risk": "https://lottie.host/41993780-0015-4405-8731-182066376635/pY1G4d8d7a.json",
+    # 3D Global Language
+    "hindi": "https://lottie.host/98685764-8834-4576-8767-664854344847/g444544555.json",
+}
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "lottie")
+CACHE_DIR = os.path.join(".cache", "lottie")
+FETCH_TIMEOUT = 5
+OFFLINE = os.environ.get("CONTRACT_OFFLINE") == "1"
+
+_loaded = {}
+_lock = threading.Lock()
+_fetch_started = False
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _fetch_missing():
+    import requests  # only needed when an animation is not on disk yet
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for name, url in LOTTIE_URLS.items():
+        if name in _loaded:
+            continue
+        try:
+            r = requests.get(url, timeout=FETCH_TIMEOUT)
+            if r.status_code != 200:
+                continue
+            data = r.json()
+        except Exception:
+            continue
+        path = os.path.join(CACHE_DIR, f"{name}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+        with _lock:
+            _loaded[name] = data
+
+def load_lottie(name):
+    """The animation JSON for a LOTTIE_URLS name, or None if it is not available (yet)."""
+    global _fetch_started
+    with _lock:
+        if name in _loaded:
+            return _loaded[name]
+    data = _read(os.path.join(BUNDLED_DIR, f"{name}.json")) or _read(os.path.join(CACHE_DIR, f"{name}.json"))
+    with _lock:
+        if data is not None:
+            _loaded[name] = data
+        elif not OFFLINE and not _fetch_started:
+            _fetch_started = True
+            threading.Thread(target=_fetch_missing, name="lottie-fetch", daemon=True).start()
+    return data
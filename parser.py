@@ -1,18 +1,104 @@
-import pdfplumber
-import docx
+import os
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_text(file):
+from instrumentation import timed
+from docx_reader import iter_docx_text
+
+# pdfplumber is imported by the branches that need it, so importing the
+# pipeline (and the app's landing page) stays fast
+
+# Below this many pages a process pool costs more to start than it saves
+PARALLEL_MIN_PAGES = 40
+PAGES_PER_TASK = 8
+
+def _extract_page_range(path, start, stop):
+    """Worker task: opens the PDF on its own and returns (page_number, text) for pages[start:stop]."""
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for page_number in range(start, stop):
+            page = pdf.pages[page_number]
+            text = page.extract_text()
+            page.close()
+            if text:
+                pages.append((page_number + 1, text))
+    return pages
+
+def _os_path(file):
+    """
+    The path the file can be reopened from, or None. Only paths and real OS
+    files opened by absolute path count: an upload's .name is just the name
+    the user gave it, and a file of that name here may be another document.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    name = getattr(file, "name", None)
+    try:
+        file.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return name if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name) else None
+
+def _iter_pdf_pages_parallel(file, page_count, workers):
+    # Workers open the file by path; anything else (uploads only exist in memory) is spilled to disk
+    path = _os_path(file)
+    temp_path = None
+    if path is None:
+        file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(file.read())
+        path = temp_path = tmp.name
+
+    try:
+        starts = range(0, page_count, PAGES_PER_TASK)
+        stops = [min(start + PAGES_PER_TASK, page_count) for start in starts]
+        # spawn, not fork: the Streamlit server process is multi-threaded
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # map() returns the page ranges in order, each as soon as it is ready
+            for pages in pool.map(_extract_page_range, [path] * len(stops), starts, stops):
+                yield from pages
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+def iter_pages(file, workers=None):
+    """
+    Yields (page_number, text) for each page that has text, so downstream
+    stages can start before the whole document is parsed. DOCX and TXT
+    files have no pages: DOCX text comes in chunks of whole lines and TXT
+    as one chunk, with page_number None.
+
+    Large PDFs are parsed on a process pool of `workers` processes (default:
+    all cores); pass workers=1 to always parse in this process.
+    """
     if file.name.endswith(".pdf"):
-        text = ""
+        import pdfplumber
+
+        workers = workers or os.cpu_count() or 1
         with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                if page.extract_text():
-                    text += page.extract_text() + "\n"
-        return text
+            page_count = len(pdf.pages)
+            if workers == 1 or page_count < PARALLEL_MIN_PAGES:
+                for page_number, page in enumerate(pdf.pages, start=1):
+                    text = page.extract_text()
+                    # Drop the parsed layout objects so memory stays flat on long PDFs
+                    page.close()
+                    if text:
+                        yield page_number, text
+                return
+        yield from _iter_pdf_pages_parallel(file, page_count, workers)
 
     elif file.name.endswith(".docx"):
-        doc = docx.Document(file)
-        return "\n".join(p.text for p in doc.paragraphs)
+        # Streamed out of the zip in chunks, tables, headers and list numbers included
+        for text in iter_docx_text(file):
+            yield None, text
 
     else:  # txt
-        return file.read().decode("utf-8")
+        yield None, file.read().decode("utf-8")
+
+@timed("extract_text")
+def extract_text(file, workers=None):
+    return "\n".join(text for _, text in iter_pages(file, workers))
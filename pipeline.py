@@ -0,0 +1,45 @@
+from parser import iter_pages
+from hindi_fixer import kruti_to_unicode
+from clause_splitter import iter_clauses
+from analysis_engine import iter_analyses
+from risk_analyzer import RISK_LEVELS, FAILED
+from instrumentation import timed_iter
+
+def iter_document_results(file, use_legacy_fix=False, page_workers=None, on_partial=None, **engine_options):
+    """
+    Runs the audit pipeline on one uploaded or opened file as a stream:
+    pages -> Kruti Dev fix (optional) -> clauses -> analyses.
+
+    Yields (index, row) as each clause finishes, where row is the analysis
+    result plus the clause text, its 1-based id, citation label and page.
+    on_partial(row, explanation) gets the explanation streamed so far for a
+    clause still being analyzed; row holds only its id, citation label and page.
+    engine_options are passed to analysis_engine.iter_analyses.
+    """
+    # Clause records (label, nesting, page) by position; the engine only sees the text
+    clause_index = []
+
+    def clause_texts():
+        pages = timed_iter("extract_text", iter_pages(file, page_workers))
+        if use_legacy_fix:
+            pages = ((page_number, kruti_to_unicode(page_text)) for page_number, page_text in pages)
+        for clause in timed_iter("split_clauses", iter_clauses(pages)):
+            clause_index.append(clause)
+            yield clause.text
+
+    if on_partial:
+        engine_options["on_partial"] = lambda i, explanation: on_partial(
+            {'id': i + 1, 'ref': clause_index[i].ref, 'page': clause_index[i].page}, explanation)
+    for i, clause_text, row in iter_analyses(clause_texts(), **engine_options):
+        row['clause'] = clause_text
+        row['id'] = i + 1
+        row['ref'] = clause_index[i].ref
+        row['page'] = clause_index[i].page
+        yield i, row
+
+def empty_risk_counts():
+    return {**{level: 0 for level in RISK_LEVELS}, FAILED: 0}
+
+def overall_status(risk_counts):
+    """Overall Score of a document from its per-clause risk counts."""
+    return "CRITICAL" if risk_counts["High"] >= 3 else "MODERATE" if risk_counts["High"] >= 1 else "SAFE"
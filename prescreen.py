@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import threading
+
+# Local triage in front of the AI: clauses with no risk signal (signature
+# blocks, witness lines, plain definitions) get a local Low result instead
+# of a Gemini call. Each rule is (regex, weight); a rule counts once per
+# clause and the clause goes to the AI when the total reaches the threshold.
+# Rules with a negative weight mark boilerplate and count only when no risk
+# rule matched, so "witness" cannot pull an indemnity clause down to Low.
+# Hindi terms are plain substrings: \b is unreliable around Devanagari matras.
+DEFAULT_RULES = {
+    # Liability and money
+    "indemnity": (r"\bindemn\w*|\bhold harmless|क्षतिपूर्ति", 3),
+    "liability": (r"\bliabilit\w*|\bliable\b|दायित्व|उत्तरदायी", 3),
+    "penalty": (r"\bpenalt\w*|\bliquidated damages|\bfine[sd]?\b|\bforfeit\w*|जुर्माना|दंड|दण्ड|अर्थदंड", 3),
+    "damages": (r"\bdamages?\b|\bloss(?:es)?\b|हानि|नुकसान", 2),
+    "payment": (r"\bpay(?:ment|able)?\b|\bfees?\b|\binterest\b|\bdeposit\b|\brent\b|\bsalary\b|\brs\.?|₹|\binr\b|"
+                r"भुगतान|ब्याज|किराया|वेतन|पूंजी|रुपये|रु\.", 1),
+    # Ending the contract
+    "termination": (r"\bterminat\w*|\bcancel\w*|\brescind\w*|\bnotice period|समाप्ति|समाप्त|विघटन|विघटित|निरस्त", 3),
+    # Disputes
+    "arbitration": (r"\barbitrat\w*|\bjurisdiction\b|\bcourts?\b|\bdisputes?\b|\bgoverning law|"
+                    r"मध्यस्थ|पंच|न्यायालय|वाद-विवाद|विवाद|क्षेत्राधिकार", 2),
+    # One-sided or restrictive terms
+    "restriction": (r"\bnon-?compete\b|\bshall not\b|\bexclusiv\w*|\brestrict\w*|\bsole discretion\b|"
+                    r"\birrevocabl\w*|\bwaive\w*|\bwithout notice\b|\bunilateral\w*|"
+                    r"नहीं करेगा|नहीं करेंगे|बाध्यकारी|एकतरफा", 2),
+    "confidentiality": (r"\bconfidential\w*|\bnon-disclosure\b|\bintellectual property\b|गोपनीय", 2),
+    "security": (r"\bguarant\w*|\bsecurity\b|\bcollateral\b|\blien\b|\bmortgage\b|\bsurety\b|जमानत|प्रतिभूति|बंधक", 2),
+    # Boilerplate lowers the score of clauses without risk terms
+    "signature": (r"\bin witness whereof\b|\bwitness(?:es)?\b|\bsignature\b|\bsealed and delivered\b|"
+                  r"हस्ताक्षर|साक्षी|साक्षियों|गवाह", -2),
+}
+DEFAULT_THRESHOLD = 1
+# Optional JSON file replacing DEFAULT_RULES for the app
+RULES_PATH = os.environ.get("PRESCREEN_RULES_PATH")
+# Long clauses are rarely boilerplate; they always go to the AI
+MAX_LOCAL_CHARS = 600
+
+def load_rules(path):
+    """Reads rules from a JSON file of {"name": ["regex", weight], ...}."""
+    with open(path, encoding="utf-8") as f:
+        return {name: (pattern, weight) for name, (pattern, weight) in json.load(f).items()}
+
+def local_result(score):
+    return {
+        "risk": "Low",
+        "explanation": "Screened locally as boilerplate: no liability, payment, termination, dispute "
+                       "or restriction terms were found, so this clause was not sent to the AI.",
+        "suggestion": "No action needed. Open the clause text if it matters to your deal.",
+        "source": "prescreen",
+        "score": score,
+    }
+
+class Prescreen:
+    """
+    Compiled rule set. All rules are combined into one regex with a named
+    group per rule, so a clause is scored in a single scan.
+    """
+    def __init__(self, rules=None, threshold=DEFAULT_THRESHOLD, max_local_chars=MAX_LOCAL_CHARS):
+        self.rules = dict(rules or DEFAULT_RULES)
+        self.threshold = threshold
+        self.max_local_chars = max_local_chars
+        self._weights = {}
+        groups = []
+        for i, (name, (pattern, weight)) in enumerate(self.rules.items()):
+            group = f"r{i}"
+            self._weights[group] = weight
+            groups.append(f"(?P<{group}>{pattern})")
+        self._pattern = re.compile("|".join(groups), re.IGNORECASE)
+        self.screened = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def score(self, text):
+        """
+        Sum of the weights of the distinct risk rules matching the clause, or,
+        if none matched, of the boilerplate (negative weight) rules.
+        """
+        weights = [self._weights[group] for group in {match.lastgroup for match in self._pattern.finditer(text)}]
+        risk = sum(weight for weight in weights if weight > 0)
+        return risk if risk else sum(weights)
+
+    def screen(self, text):
+        """Returns a local Low result if the clause can skip the AI, else None."""
+        score = self.score(text) if len(text) <= self.max_local_chars else None
+        skip = score is not None and score < self.threshold
+        with self._lock:
+            self.screened += 1
+            self.skipped += skip
+        return local_result(score) if skip else None
+
+    def stats(self):
+        return {"screened": self.screened, "skipped": self.skipped}
+
+_shared_prescreen = None
+_shared_lock = threading.Lock()
+
+def get_prescreen():
+    """Process-wide pre-screen, using RULES_PATH when it is set."""
+    global _shared_prescreen
+    with _shared_lock:
+        if _shared_prescreen is None:
+            _shared_prescreen = Prescreen(load_rules(RULES_PATH) if RULES_PATH else None)
+        return _shared_prescreen
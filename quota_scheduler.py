@@ -0,0 +1,225 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from instrumentation import count, gauge, span
+
+# One scheduler per process sits in front of every model call, so concurrent
+# Streamlit sessions share the Gemini quota instead of each running into 429s.
+# Requests wait for both a requests/min and a tokens/min bucket; waiting
+# sessions are served fairly (by tokens granted so far), higher priorities
+# first; a rate-limit reply pauses everyone and lowers the rate until calls
+# succeed again. A limit of 0 means no limit for that bucket: GEMINI_TPM=0
+# paces requests only, and GEMINI_RPM=0 with GEMINI_TPM=0 turns it off.
+DEFAULT_RPM = int(os.environ.get("GEMINI_RPM", 60))
+DEFAULT_TPM = int(os.environ.get("GEMINI_TPM", 120_000))
+# Buckets hold this many seconds of quota, so a quiet server can burst a little
+BURST_SECONDS = 10
+# Output tokens reserved per request on top of the prompt, settled from usage metadata
+OUTPUT_TOKEN_ESTIMATE = 400
+
+# Priorities: lower is served first
+INTERACTIVE = 0
+BATCH = 1
+
+# Adaptive backoff on rate-limit replies: pause, then halve the rate; every
+# success earns back a little of it
+BACKOFF_START = 2.0
+BACKOFF_MAX = 60.0
+RATE_FLOOR = 0.1
+RATE_RECOVERY = 0.05
+
+_session = contextvars.ContextVar("quota_session", default=("default", INTERACTIVE))
+
+@contextmanager
+def quota_session(session_id, priority=INTERACTIVE):
+    """Model calls made in this context (and in worker threads given a copy of it) count towards session_id."""
+    token = _session.set((session_id, priority))
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+def is_rate_limited(error):
+    from google.api_core import exceptions as api_exceptions  # only needed once a call has failed
+    return isinstance(error, (api_exceptions.TooManyRequests, api_exceptions.ResourceExhausted))
+
+class TokenBucket:
+    """
+    Refills at `per_minute` (scaled by the scheduler's rate factor) up to
+    `capacity`; may go into debt. per_minute=0 never makes anyone wait.
+    """
+    def __init__(self, per_minute, capacity):
+        self.unlimited = per_minute <= 0
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now, factor):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate * factor)
+        self.updated = now
+
+    def delay(self, amount, factor):
+        """Seconds until `amount` can be taken (a request bigger than the bucket waits for a full one)."""
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 or self.unlimited else missing / (self.rate * factor)
+
+class _Ticket:
+    __slots__ = ("session", "priority", "tokens", "seq", "queued")
+
+    def __init__(self, session, priority, tokens, seq):
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.seq = seq
+        self.queued = time.monotonic()
+
+class QuotaScheduler:
+    """Shared admission control for model calls; see slot(). rpm or tpm 0 leaves that bucket unlimited."""
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, max(1, rpm * BURST_SECONDS / 60))
+        self.tokens = TokenBucket(tpm, max(1, tpm * BURST_SECONDS / 60))
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self._backoff = BACKOFF_START
+        self._queues = {}     # session -> deque of waiting tickets
+        self._served = {}     # session -> tokens granted (fair-share clock)
+        self._clock = 0.0     # served value of the last grant, where returning sessions start
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _head(self):
+        """The ticket to serve next: best priority, then least-served session, then oldest."""
+        heads = [queue[0] for queue in self._queues.values() if queue]
+        return min(heads, key=lambda t: (t.priority, self._served[t.session], t.seq)) if heads else None
+
+    def _waiting(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def acquire(self, tokens):
+        """Blocks until a request of about `tokens` tokens may be sent; returns the seconds waited."""
+        session, priority = _session.get()
+        with self._cond:
+            queue = self._queues.setdefault(session, deque())
+            if not queue:
+                # A session coming back does not get credit for the time it was idle
+                self._served[session] = self._clock
+            ticket = _Ticket(session, priority, tokens, next(self._seq))
+            queue.append(ticket)
+            gauge("quota_queue_depth", self._waiting())
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._head() is ticket:
+                        self.requests.refill(now, self.rate_factor)
+                        self.tokens.refill(now, self.rate_factor)
+                        delay = max(self.paused_until - now, self.requests.delay(1, self.rate_factor),
+                                    self.tokens.delay(tokens, self.rate_factor))
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            finally:
+                queue.remove(ticket)
+                if not queue:
+                    # Idle sessions are forgotten; when they return they start at the current clock
+                    del self._queues[session]
+                self._cond.notify_all()
+            self.requests.level -= 1
+            self.tokens.level -= tokens
+            self._served[session] += tokens
+            self._clock = self._served[session]
+            if session not in self._queues:
+                del self._served[session]
+            gauge("quota_queue_depth", self._waiting())
+        return time.monotonic() - ticket.queued
+
+    def settle(self, estimated, actual):
+        """Corrects the token bucket once the real usage of a request is known."""
+        with self._cond:
+            self.tokens.level -= actual - estimated
+
+    def rate_limited(self):
+        """A 429 came back: pause every session, then resume at a lower rate."""
+        count("quota_rate_limited")
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + self._backoff)
+            self._backoff = min(self._backoff * 2, BACKOFF_MAX)
+            self.rate_factor = max(RATE_FLOOR, self.rate_factor / 2)
+            gauge("quota_rate_factor", self.rate_factor)
+            self._cond.notify_all()
+
+    def succeeded(self):
+        with self._cond:
+            self._backoff = BACKOFF_START
+            if self.rate_factor < 1.0:
+                self.rate_factor = min(1.0, self.rate_factor + RATE_RECOVERY)
+                gauge("quota_rate_factor", self.rate_factor)
+
+    @contextmanager
+    def slot(self, tokens):
+        """
+        Waits for quota for one request of about `tokens` prompt tokens, then
+        runs the body (the model call). A rate-limit error raised by the body
+        slows the whole process down; the error still propagates to the caller.
+        """
+        tokens += OUTPUT_TOKEN_ESTIMATE
+        with span("quota_wait"):
+            waited = self.acquire(tokens)
+        count("quota_wait_ms", int(waited * 1000))
+        try:
+            yield tokens
+        except Exception as e:
+            if is_rate_limited(e):
+                self.rate_limited()
+            raise
+        self.succeeded()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            return {"waiting": {session: len(queue) for session, queue in self._queues.items() if queue},
+                    "rate_factor": round(self.rate_factor, 2),
+                    "paused_seconds": round(max(0.0, self.paused_until - now), 1),
+                    "rpm": self.rpm, "tpm": self.tpm}
+
+class _Unlimited:
+    """Stand-in when the scheduler is turned off."""
+    @contextmanager
+    def slot(self, tokens):
+        yield tokens
+
+    def settle(self, estimated, actual):
+        pass
+
+    def stats(self):
+        return {}
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+def get_scheduler():
+    """Process-wide scheduler, so all Streamlit sessions share one quota."""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = QuotaScheduler() if DEFAULT_RPM > 0 or DEFAULT_TPM > 0 else _Unlimited()
+        return _shared_scheduler
+
+def configure(rpm=DEFAULT_RPM, tpm=DEFAULT_TPM):
+    """
+    Replaces the process-wide scheduler, e.g. with a share of the quota per
+    batch worker. 0 leaves that limit off; both 0 turn the scheduler off.
+    """
+    global _shared_scheduler
+    with _shared_lock:
+        _shared_scheduler = QuotaScheduler(rpm, tpm) if rpm > 0 or tpm > 0 else _Unlimited()
+        return _shared_scheduler
@@ -1,11 +1,113 @@
-from fpdf import FPDF
 import io
+import os
+import re
+from functools import lru_cache
+
+from fpdf import FPDF, set_global
+
+from instrumentation import timed
+
+# TrueType fonts with Devanagari glyphs, tried in order for the PDF as
+# (regular, bold) paths; the first one found is embedded so Hindi is printed
+# instead of '?'. REPORT_FONT_PATH (which must cover Devanagari) or a font
+# dropped into ./fonts wins; on Streamlit Cloud packages.txt installs Noto.
+_FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+DEVANAGARI_FONTS = [
+    (os.environ.get("REPORT_FONT_PATH", ""), os.environ.get("REPORT_BOLD_FONT_PATH", "")),
+    (os.path.join(_FONT_DIR, "NotoSansDevanagari-Regular.ttf"), os.path.join(_FONT_DIR, "NotoSansDevanagari-Bold.ttf")),
+    ("/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf",
+     "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Bold.ttf"),
+    ("/usr/share/fonts/truetype/lohit-devanagari/Lohit-Devanagari.ttf", ""),
+    ("C:\\Windows\\Fonts\\Nirmala.ttf", "C:\\Windows\\Fonts\\NirmalaB.ttf"),
+    ("C:\\Windows\\Fonts\\mangal.ttf", "C:\\Windows\\Fonts\\mangalb.ttf"),
+]
+# Used when none of the above is installed: no Devanagari glyphs, but still
+# covers ₹, curly quotes and dashes in English reports
+FALLBACK_FONTS = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+]
+_DEVANAGARI = re.compile("[\u0900-\u097F]")
+# fpdf parses a TrueType font once and keeps the metrics here
+FONT_CACHE_DIR = os.path.join(".cache", "fonts")
+UNICODE_FAMILY = "ReportUnicode"
+
+def _first_font(candidates):
+    for regular, bold in candidates:
+        if regular and os.path.isfile(regular):
+            return regular, bold if bold and os.path.isfile(bold) else regular
+    return None
+
+@lru_cache(maxsize=1)
+def find_devanagari_font():
+    """(regular, bold) paths of the first available Devanagari font; bold may repeat regular. None if none is found."""
+    return _first_font(DEVANAGARI_FONTS)
+
+@lru_cache(maxsize=1)
+def find_unicode_font():
+    """Like find_devanagari_font, falling back to a Unicode font without Devanagari."""
+    return find_devanagari_font() or _first_font(FALLBACK_FONTS)
+
+def missing_font_error(filename, results):
+    """Why the PDF report of these results cannot be printed (Hindi without a Devanagari font), or None."""
+    if find_devanagari_font() is not None:
+        return None
+    texts = [filename] + [row[key] or '' for row in results for key in ('explanation', 'suggestion', 'ref') if key in row]
+    if any(_DEVANAGARI.search(str(text)) for text in texts):
+        return ("No Devanagari font found for a Hindi report: install fonts-noto-core (see packages.txt), "
+                "put NotoSansDevanagari-Regular.ttf in ./fonts or set REPORT_FONT_PATH")
+    return None
+
+class _GlyphSubset(list):
+    """
+    fpdf 1.7.2 appends to a Unicode font's glyph subset list for every
+    character printed, then tests every code point for membership when the
+    PDF is written, which is quadratic in report length. This list stays
+    free of duplicates and answers membership from a set.
+    """
+    def __init__(self, glyphs):
+        super().__init__(dict.fromkeys(glyphs))
+        self._seen = set(self)
+
+    def append(self, glyph):
+        if glyph not in self._seen:
+            self._seen.add(glyph)
+            super().append(glyph)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        self._seen.difference_update(removed)
+
+    def __contains__(self, glyph):
+        return glyph in self._seen
 
 class LegalPDF(FPDF):
     """Custom PDF class for professional legal reporting."""
+    def __init__(self):
+        super().__init__()
+        font = find_unicode_font()
+        self.unicode = font is not None
+        if self.unicode:
+            os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+            set_global("FPDF_CACHE_MODE", 2)
+            set_global("FPDF_CACHE_DIR", FONT_CACHE_DIR)
+            regular, bold = font
+            self.add_font(UNICODE_FAMILY, "", regular, uni=True)
+            self.add_font(UNICODE_FAMILY, "B", bold, uni=True)
+            for font in self.fonts.values():
+                font['subset'] = _GlyphSubset(font['subset'])
+        self.family = UNICODE_FAMILY if self.unicode else "Arial"
+        # Every embedded font costs time and size, so there is no separate italic one
+        self.italic = '' if self.unicode else 'I'
+
+    def clean(self, text):
+        """Text as the font can print it: unchanged with a Unicode font, else latin-1 with '?'."""
+        text = str(text)
+        return text if self.unicode else text.encode('latin-1', 'replace').decode('latin-1')
+
     def header(self):
         # Professional Heading
-        self.set_font('Arial', 'B', 16)
+        self.set_font(self.family, 'B', 16)
         self.set_text_color(44, 62, 80)  # Professional Deep Blue
         self.cell(0, 15, 'CONTRACT RISK ASSESSMENT REPORT', 0, 1, 'C')
         self.set_draw_color(241, 196, 15) # Gold underline
@@ -15,23 +117,36 @@ class LegalPDF(FPDF):
     def footer(self):
         # Page numbers
         self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
+        self.set_font(self.family, self.italic, 8)
         self.set_text_color(128, 128, 128)
         self.cell(0, 10, f'Page {self.page_no()} | Generated by Contract Insight AI', 0, 0, 'C')
 
-def generate_pdf_report(filename, overall_risk, results):
-    """Generates a professional PDF document of the analysis results."""
+def clause_citation(row):
+    """Human citation for a result row, e.g. "Clause 7(b), page 12"."""
+    citation = f"Clause {row.get('ref') or row['id']}"
+    return f"{citation}, page {row['page']}" if row.get('page') else citation
+
+@timed("render_pdf_report")
+def write_pdf_report(out, filename, overall_risk, results):
+    """
+    Renders the PDF report of the analysis results, then writes it to a
+    binary file or buffer (fpdf builds the whole document in memory first).
+    Raises RuntimeError for Hindi results when no Devanagari font is installed.
+    """
+    error = missing_font_error(filename, results)
+    if error:
+        raise RuntimeError(error)
     pdf = LegalPDF()
     pdf.add_page()
-    pdf.set_font("Arial", size=12)
+    pdf.set_font(pdf.family, size=12)
     
     # Metadata Section
-    pdf.set_font("Arial", 'B', 12)
+    pdf.set_font(pdf.family, 'B', 12)
     pdf.cell(40, 10, "Document Name: ", 0, 0)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, filename, 0, 1)
+    pdf.set_font(pdf.family, size=12)
+    pdf.cell(0, 10, pdf.clean(filename), 0, 1)
     
-    pdf.set_font("Arial", 'B', 12)
+    pdf.set_font(pdf.family, 'B', 12)
     pdf.cell(40, 10, "Risk Status: ", 0, 0)
     
     # Color code the overall risk in PDF
@@ -47,43 +162,52 @@ def generate_pdf_report(filename, overall_risk, results):
     pdf.ln(10)
 
     # Detailed Clause Section
-    pdf.set_font("Arial", 'B', 14)
+    pdf.set_font(pdf.family, 'B', 14)
     pdf.cell(0, 10, "Detailed Clause Analysis", ln=True)
     pdf.ln(5)
 
     for row in results:
         # Clause ID and Risk Level
-        pdf.set_font("Arial", 'B', 11)
+        pdf.set_font(pdf.family, 'B', 11)
         pdf.set_fill_color(245, 247, 250)
-        pdf.cell(0, 10, f" Clause {row['id']} - Risk: {row['risk']}", 1, 1, 'L', fill=True)
+        pdf.cell(0, 10, pdf.clean(f" {clause_citation(row)} - Risk: {row['risk']}"), 1, 1, 'L', fill=True)
         
         # Explanation and Suggestion with wrapping text
-        pdf.set_font("Arial", size=10)
+        pdf.set_font(pdf.family, size=10)
         
         # Multi-cell handles long Hindi and English text correctly
-        # Encoding to latin-1 replaces unsupported Unicode chars with '?' to prevent crashes
-        clean_exp = row['explanation'].encode('latin-1', 'replace').decode('latin-1')
-        clean_sug = row['suggestion'].encode('latin-1', 'replace').decode('latin-1')
-        
-        pdf.multi_cell(0, 8, f"Explanation: {clean_exp}", border='LR')
-        pdf.multi_cell(0, 8, f"Suggestion: {clean_sug}", border='LRB')
+        pdf.multi_cell(0, 8, pdf.clean(f"Explanation: {row['explanation']}"), border='LR')
+        pdf.multi_cell(0, 8, pdf.clean(f"Suggestion: {row['suggestion']}"), border='LRB')
         pdf.ln(5)
         
-    # Return as bytes
-    return pdf.output(dest='S').encode('latin-1')
+    out.write(pdf.output(dest='S').encode('latin-1'))
 
-def generate_txt_report(filename, overall_risk, results):
-    """Generates a plain text report for maximum compatibility."""
-    report = f"CONTRACT RISK AUDIT REPORT\n"
-    report += "="*40 + "\n"
-    report += f"FILE: {filename}\n"
-    report += f"OVERALL STATUS: {overall_risk}\n"
-    report += "="*40 + "\n\n"
+def generate_pdf_report(filename, overall_risk, results):
+    """Generates a professional PDF document of the analysis results, as bytes."""
+    buffer = io.BytesIO()
+    write_pdf_report(buffer, filename, overall_risk, results)
+    return buffer.getvalue()
+
+def iter_txt_report(filename, overall_risk, results):
+    """Yields the plain text report piece by piece: the header, then one block per clause."""
+    yield (f"CONTRACT RISK AUDIT REPORT\n"
+           f"{'=' * 40}\n"
+           f"FILE: {filename}\n"
+           f"OVERALL STATUS: {overall_risk}\n"
+           f"{'=' * 40}\n\n")
     
     for row in results:
-        report += f"[{row['id']}] RISK LEVEL: {row['risk']}\n"
-        report += f"EXPLANATION: {row['explanation']}\n"
-        report += f"SUGGESTION: {row['suggestion']}\n"
-        report += "-"*20 + "\n\n"
-        
-    return report
\ No newline at end of file
+        yield (f"[{row['id']}] {clause_citation(row).upper()} - RISK LEVEL: {row['risk']}\n"
+               f"EXPLANATION: {row['explanation']}\n"
+               f"SUGGESTION: {row['suggestion']}\n"
+               f"{'-' * 20}\n\n")
+
+@timed("render_txt_report")
+def write_txt_report(out, filename, overall_risk, results):
+    """Streams the plain text report into a text file or buffer."""
+    out.writelines(iter_txt_report(filename, overall_risk, results))
+
+@timed("render_txt_report")
+def generate_txt_report(filename, overall_risk, results):
+    """Generates a plain text report for maximum compatibility."""
+    return "".join(iter_txt_report(filename, overall_risk, results))
\ No newline at end of file
@@ -0,0 +1,229 @@
+import json
+import re
+
+# Model replies are meant to be bare JSON, but they arrive wrapped in markdown
+# fences or prose, cut off by the output limit, or with small syntax slips.
+# ReplyStream takes the reply chunk by chunk as it streams in, tracks where
+# the first JSON value starts and ends, and can read a string field before
+# the value is complete (to show a partial explanation). parse() then takes
+# the first value of the wanted type, repairing common defects if needed.
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# Characters that may follow the closing quote of a JSON string
+_AFTER_STRING = ',:}]'
+
+class ParsedReply:
+    """A JSON value read from a reply; repaired/truncated say how much fixing it needed."""
+    __slots__ = ("value", "repaired", "truncated")
+
+    def __init__(self, value, repaired=False, truncated=False):
+        self.value = value
+        self.repaired = repaired
+        self.truncated = truncated
+
+class ReplyStream:
+    """
+    Incremental scanner over a model reply. feed() it chunks; closed spans of
+    top-level JSON values (objects or arrays, after any prose) are recorded as
+    they complete, and the scan resumes after each one.
+    """
+    def __init__(self):
+        self.text = ""
+        self.spans = []       # (start, end) of each complete top-level value
+        self.open_at = None   # start of the value being scanned, if unfinished
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._fields = {}     # key -> offset where its string value starts
+
+    def feed(self, chunk):
+        self.text += chunk
+        text = self.text
+        for pos in range(self._pos, len(text)):
+            ch = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self.open_at is None:
+                if ch in "{[":
+                    self.open_at, self._depth = pos, 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.spans.append((self.open_at, pos + 1))
+                    self.open_at = None
+        self._pos = len(text)
+
+    def partial(self, key):
+        """The string value of `key` received so far (escapes decoded), or None if it has not started."""
+        start = self._fields.get(key)
+        if start is None:
+            match = re.search(r'"%s"\s*:\s*"' % re.escape(key), self.text)
+            if not match:
+                return None
+            start = self._fields[key] = match.end()
+        return read_string(self.text, start)
+
+    def parse(self, expect=dict, accept=None):
+        """
+        The first value of type `expect` (that accept(value) approves, if
+        given) in the reply: complete values are tried as-is, then repaired;
+        an unfinished value at the end (a cut-off reply) is closed by repair.
+        Raises ValueError if nothing usable is found.
+        """
+        def wanted(value):
+            return isinstance(value, expect) and (accept is None or accept(value))
+
+        candidates = [(self.text[start:end], False) for start, end in self.spans]
+        if self.open_at is not None:
+            candidates.append((self.text[self.open_at:], True))
+        for fragment, unfinished in candidates:
+            if not unfinished:
+                try:
+                    value = json.loads(fragment)
+                except ValueError:
+                    pass
+                else:
+                    if wanted(value):
+                        return ParsedReply(value)
+            try:
+                value, truncated = repair_json(fragment)
+            except ValueError:
+                continue
+            if wanted(value):
+                return ParsedReply(value, repaired=True, truncated=truncated)
+        raise ValueError(f"No JSON {expect.__name__} in reply: {self.text[:200]!r}")
+
+def parse_reply(text, expect=dict, accept=None):
+    """Parses a complete reply (see ReplyStream.parse)."""
+    stream = ReplyStream()
+    stream.feed(text)
+    return stream.parse(expect, accept)
+
+def read_string(text, start):
+    """Decodes a JSON string body from `start` up to its closing quote or the end of the text."""
+    out = []
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            break
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+        code = text[i + 1:i + 2]
+        if not code:
+            break  # the escape is split across chunks
+        if code == "u":
+            digits = text[i + 2:i + 6]
+            if len(digits) < 4:
+                break
+            try:
+                out.append(chr(int(digits, 16)))
+            except ValueError:
+                out.append(digits)
+            i += 6
+            continue
+        out.append(_ESCAPES.get(code, code))
+        i += 2
+    return "".join(out)
+
+def _next_significant(text, i):
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return text[i] if i < len(text) else ""
+
+def _closes_string(text, i):
+    """True if the quote at i ends the string rather than being an unescaped quote inside it."""
+    following = _next_significant(text, i + 1)
+    if not following or following in _AFTER_STRING:
+        return True
+    # "a": "x"  <newline>  "b": ... is a missing comma, not an inner quote
+    return following == '"' and "\n" in text[i + 1:text.index('"', i + 1)]
+
+def repair_json(fragment):
+    """
+    Fixes the usual slips in model JSON: single quotes, Python literals,
+    trailing or missing commas, raw newlines and stray quotes inside strings,
+    and a cut-off end (open strings and brackets are closed). Returns
+    (value, truncated); raises ValueError if the result still does not parse.
+    """
+    out = []
+    stack = []
+    quote = None      # the quote character of the string being copied
+    last = ""         # last significant character written outside strings
+    i = 0
+    n = len(fragment)
+    while i < n:
+        ch = fragment[i]
+        if quote:
+            if ch == "\\" and i + 1 < n:
+                out.append(fragment[i:i + 2])
+                i += 2
+                continue
+            if ch == quote and (quote == "'" or _closes_string(fragment, i)):
+                out.append('"')
+                quote = None
+                last = '"'
+            elif ch == '"':
+                out.append('\\"')
+            elif ch in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[ch])
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            if last and (last in '"}]' or last.isalnum()):
+                out.append(",")  # two values in a row
+            out.append('"')
+            quote = ch
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+            last = ch
+        elif ch in "}]":
+            if stack:
+                out.append(stack.pop())
+                last = out[-1]
+        elif ch == ",":
+            if _next_significant(fragment, i + 1) not in ("}", "]", "") and last not in ",[{":
+                out.append(ch)
+                last = ch
+        elif ch.isalpha():
+            word = re.match(r"\w+", fragment[i:]).group()
+            out.append(_LITERALS.get(word, word))
+            last = word[-1]
+            i += len(word)
+            continue
+        elif ch == "`":
+            pass  # a markdown fence that ended up inside the span
+        else:
+            out.append(ch)
+            if not ch.isspace():
+                last = ch
+        i += 1
+
+    truncated = bool(quote or stack)
+    if quote:
+        out.append('"')
+        last = '"'
+    if truncated:
+        # Drop a dangling comma, or a key left without its value
+        text = re.sub(r',\s*\Z', "", "".join(out))
+        if stack and stack[-1] == "}":
+            text = re.sub(r'([,{])\s*"(?:[^"\\]|\\.)*"\s*(?::\s*)?\Z', lambda m: m.group(1).replace(",", ""), text)
+        out = [text] + stack[::-1]
+    return json.loads("".join(out)), truncated
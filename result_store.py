@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # approximate, based on the sizes callers report
+
+def document_key(file_bytes, use_legacy_fix=False):
+    """Identifies one analysis run: the uploaded file's content plus the options that change it."""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return f"{digest}:{'kruti' if use_legacy_fix else 'plain'}"
+
+class ResultStore:
+    """
+    Thread-safe LRU store for finished pipeline results, so Streamlit reruns
+    (tab switches, expanders, downloads) reuse them instead of re-analyzing.
+    Bounded by entry count and by the approximate size reported on put().
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, size=0):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # Always keep the newest entry, even if it alone exceeds the byte limit
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+def result_size(result):
+    """
+    Approximate in-memory size of a pipeline result, in characters of text
+    held, plus the summary and rendered reports attached to it later.
+    """
+    size = sum(len(str(value)) for row in result["analysis_data"] for value in row.values())
+    return size + sum(len(result[key]) for key in ("summary", "pdf", "txt") if key in result)
+
+_shared_store = ResultStore()
+
+def get_store():
+    """Process-wide store shared by every Streamlit session on this server."""
+    return _shared_store
@@ -0,0 +1,133 @@
+import hashlib
+from difflib import SequenceMatcher
+
+from analysis_cache import normalize_clause
+from risk_analyzer import FAILED
+
+# Revision mode: a re-uploaded redline is compared clause by clause with the
+# previous version. Clauses whose text is unchanged (wherever they moved)
+# keep their earlier analysis, so only edited and new clauses cost AI calls.
+# For the risk diff, edited clauses are paired with the clause they replace
+# by fuzzy matching within each changed stretch of the document.
+
+# Word-level similarity at which a changed clause counts as an edit of an
+# old one rather than a new clause
+MODIFIED_THRESHOLD = 0.5
+# Old clauses compared with each new one inside a changed stretch
+MATCH_WINDOW = 8
+
+UNCHANGED, MODIFIED, NEW, REMOVED = "unchanged", "modified", "new", "removed"
+
+def clause_hash(text):
+    return hashlib.sha1(normalize_clause(text).encode("utf-8")).hexdigest()
+
+class PreviousVersion:
+    """Analyses of an earlier version, looked up by clause text (see iter_analyses(previous=...))."""
+    def __init__(self, rows):
+        self._results = {}
+        for row in rows:
+            if row["risk"] != FAILED:
+                self._results.setdefault(clause_hash(row["clause"]), row)
+
+    def lookup(self, clause, language="English"):
+        """The earlier analysis of an identical clause, marked source="previous", or None."""
+        row = self._results.get(clause_hash(clause))
+        if row is None:
+            return None
+        result = {k: row[k] for k in ("risk", "explanation", "suggestion") if k in row}
+        result.update(source="previous", previous_ref=row.get("ref"))
+        return result
+
+    def __len__(self):
+        return len(self._results)
+
+def _similarity(a, b):
+    return SequenceMatcher(None, a.lower().split(), b.lower().split(), autojunk=False).ratio()
+
+def _pair_changed(old_rows, new_rows):
+    """Pairs edited clauses within one changed stretch, in document order; yields (old, new) with None for unpaired."""
+    used = set()
+    start = 0
+    for new in new_rows:
+        best, best_score = None, MODIFIED_THRESHOLD
+        for j in range(start, min(start + MATCH_WINDOW, len(old_rows))):
+            if j in used:
+                continue
+            score = _similarity(old_rows[j]["clause"], new["clause"])
+            if score >= best_score:
+                best, best_score = j, score
+        if best is None:
+            yield None, new
+        else:
+            used.add(best)
+            start = best + 1
+            yield old_rows[best], new
+    for j, old in enumerate(old_rows):
+        if j not in used:
+            yield old, None
+
+def align_versions(old_rows, new_rows):
+    """
+    Aligns the clause rows of two versions. Returns (kind, old_row, new_row)
+    in new-document order, followed by removed clauses. Identical clauses
+    match wherever they are; the rest are paired by fuzzy matching.
+    """
+    old_hashes = [clause_hash(row["clause"]) for row in old_rows]
+    new_hashes = [clause_hash(row["clause"]) for row in new_rows]
+    aligned, removed = [], []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_hashes, new_hashes, autojunk=False).get_opcodes():
+        if tag == "equal":
+            aligned.extend((UNCHANGED, old_rows[i], new_rows[j]) for i, j in zip(range(i1, i2), range(j1, j2)))
+            continue
+        for old, new in _pair_changed(old_rows[i1:i2], new_rows[j1:j2]):
+            if new is None:
+                removed.append(old)
+            else:
+                aligned.append((MODIFIED if old else NEW, old, new))
+
+    # A clause that only moved shows up as removed in one place and new in another
+    moved_from = {}
+    for old in removed:
+        moved_from.setdefault(clause_hash(old["clause"]), []).append(old)
+    for n, (kind, old, new) in enumerate(aligned):
+        if kind == NEW and moved_from.get(clause_hash(new["clause"])):
+            aligned[n] = (UNCHANGED, moved_from[clause_hash(new["clause"])].pop(0), new)
+    still_removed = [old for olds in moved_from.values() for old in olds]
+    return aligned + [(REMOVED, old, None) for old in sorted(still_removed, key=lambda row: row["id"])]
+
+def risk_changes(old_rows, new_rows):
+    """
+    The revision diff: one entry per new, removed or edited clause, and per
+    unchanged clause whose risk changed, with old and new ref and risk.
+    Also returns counts per kind.
+    """
+    changes, counts = [], {UNCHANGED: 0, MODIFIED: 0, NEW: 0, REMOVED: 0}
+    for kind, old, new in align_versions(old_rows, new_rows):
+        counts[kind] += 1
+        old_risk, new_risk = old and old["risk"], new and new["risk"]
+        if kind == UNCHANGED and old_risk == new_risk:
+            continue
+        changes.append({"kind": kind, "ref": (new or old).get("ref"), "id": (new or old)["id"],
+                        "old_ref": old and old.get("ref"), "old_risk": old_risk, "new_risk": new_risk})
+    return changes, counts
+
+_RISK_ORDER = {"Low": 0, "Medium": 1, "High": 2}
+
+def describe_change(change):
+    """One line such as "Clause 9: Low → High" (for the dashboard and reports)."""
+    label = f"Clause {change['ref'] or change['id']}"
+    if change["kind"] == NEW:
+        return f"{label} (new): {change['new_risk']}"
+    if change["kind"] == REMOVED:
+        return f"{label} (removed): was {change['old_risk']}"
+    if change["old_ref"] and change["old_ref"] != change["ref"]:
+        label += f" (was {change['old_ref']})"
+    return f"{label}: {change['old_risk']} → {change['new_risk']}"
+
+def risk_direction(change):
+    """+1 if the risk went up, -1 if it went down, 0 otherwise (failed or same)."""
+    old = _RISK_ORDER.get(change["old_risk"] or "Low")
+    new = _RISK_ORDER.get(change["new_risk"] or "Low")
+    if old is None or new is None:
+        return 0
+    return (new > old) - (new < old)
@@ -1,25 +1,66 @@
-import google.generativeai as genai
-import json
-import streamlit as st
+import os
+import re
+import threading
+import time
 
-# Configure your API Key securely using Streamlit Secrets
-# Create .streamlit/secrets.toml and add: GEMINI_API_KEY = "your_key"
-try:
-    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-except Exception:
-    # Fallback for local testing if secrets are not set
-    genai.configure(api_key="YOUR_GEMINI_API_KEY_HERE")
+from instrumentation import count, timed
+from quota_scheduler import get_scheduler
+from response_parser import ReplyStream, parse_reply
 
-model = genai.GenerativeModel('gemini-pro')
+MODEL_NAME = 'gemini-pro'
 
-def analyze_clause(clause, language="English"):
-    """
-    Analyzes a contract clause using AI with a focus on Indian legal standards.
-    Supports both English and Hindi text.
-    """
-    
-    # Enhanced prompt for higher accuracy and legal grounding
-    prompt = f"""
+# The model backend: anything with generate_content(prompt, **kwargs) returning
+# an object with .text. Gemini is imported and configured on first use (see
+# get_model), so importing this module is fast and needs neither Streamlit
+# nor an API key.
+model = None
+_model_lock = threading.Lock()
+
+def _api_key():
+    # GEMINI_API_KEY in the environment wins (batch runs, CI)
+    if os.environ.get("GEMINI_API_KEY"):
+        return os.environ["GEMINI_API_KEY"]
+    # Configure your API Key securely using Streamlit Secrets
+    # Create .streamlit/secrets.toml and add: GEMINI_API_KEY = "your_key"
+    try:
+        import streamlit as st
+        return st.secrets["GEMINI_API_KEY"]
+    except Exception:
+        # Fallback for local testing if secrets are not set
+        return "YOUR_GEMINI_API_KEY_HERE"
+
+def get_model():
+    """Returns the model backend, configuring Gemini the first time it is needed."""
+    global model
+    with _model_lock:
+        if model is None:
+            import google.generativeai as genai  # slow to import; only needed for real calls
+            genai.configure(api_key=_api_key())
+            model = genai.GenerativeModel(MODEL_NAME)
+        return model
+
+def set_model(backend):
+    """Plugs in another model backend, e.g. a local stand-in for offline runs."""
+    global model
+    with _model_lock:
+        model = backend
+
+RISK_LEVELS = ("High", "Medium", "Low")
+
+# Risk labels as models also write them: "HIGH", "High risk", "**Medium**", Hindi terms
+_RISK_WORDS = {"high": "High", "medium": "Medium", "moderate": "Medium", "low": "Low",
+               "उच्च": "High", "मध्यम": "Medium", "निम्न": "Low", "कम": "Low"}
+
+# Risk label for clauses the AI could not analyze. It is shown as-is in the
+# dashboard so a failed call is never mistaken for a real assessment.
+FAILED = "Failed"
+
+# Bump PROMPT_VERSION whenever the prompt changes in a way that makes older
+# analyses stale; cached results from other versions are then ignored.
+PROMPT_VERSION = 1
+
+# Enhanced prompt for higher accuracy and legal grounding
+PROMPT_TEMPLATE = """
     Act as a senior legal counsel specializing in Indian Law (e.g., Indian Contract Act, 1872). 
     Analyze the following contract clause accurately.
     
@@ -40,23 +81,201 @@ def analyze_clause(clause, language="English"):
         "suggestion": "Actionable fix here"
     }}
     """
+
+# Same instructions for several clauses at once, so the preamble is paid once per batch
+BATCH_PROMPT_TEMPLATE = """
+    Act as a senior legal counsel specializing in Indian Law (e.g., Indian Contract Act, 1872). 
+    Analyze EACH of the following contract clauses accurately and independently.
     
+    The analysis must be provided in {language}, but if the input is in Hindi, 
+    the explanation should include Hindi legal terms for better understanding.
+    
+    For every clause provide:
+    1. risk: Categorize as 'High', 'Medium', or 'Low'.
+    2. explanation: A detailed legal reasoning of why this is a risk.
+    3. suggestion: Specific actionable advice to mitigate the risk or renegotiate.
+    
+    Each clause starts with its numeric id in square brackets:
+    {clauses}
+    
+    Return the response ONLY as a JSON array with exactly one object per clause, in this exact format:
+    [
+        {{
+            "id": 1,
+            "risk": "High/Medium/Low",
+            "explanation": "Detailed reasoning here",
+            "suggestion": "Actionable fix here"
+        }}
+    ]
+    """
+
+# Asked once when a reply is unusable even after repair: just the clause and
+# the bad reply, without the long instructions
+REASK_PROMPT_TEMPLATE = """
+    Your previous reply to a contract clause analysis could not be read as JSON.
+    Previous reply: {reply}
+    
+    The analysis must be provided in {language}.
+    Clause: {clause}
+    
+    Return the response ONLY as this JSON object, with no other text:
+    {{"risk": "High/Medium/Low", "explanation": "Detailed reasoning here", "suggestion": "Actionable fix here"}}
+    """
+# Characters of the unusable reply quoted back in a re-ask
+REASK_REPLY_CHARS = 1500
+
+def generate(prompt, timeout=None, on_text=None):
+    """
+    Sends a prompt to the model once quota is available (see quota_scheduler)
+    and returns the response. Every model call goes through here. With
+    on_text, the reply is streamed and on_text(chunk) gets each piece of
+    text as it arrives.
+    """
+    request_options = {"timeout": timeout} if timeout else None
+    count("llm_requests")
+    count("llm_prompt_chars", len(prompt))
+    scheduler = get_scheduler()
+    # About four characters per token
+    with scheduler.slot(len(prompt) // 4) as reserved:
+        if on_text:
+            started = time.perf_counter()
+            response = get_model().generate_content(prompt, stream=True, request_options=request_options)
+            for n, chunk in enumerate(response):
+                if n == 0:
+                    count("llm_streamed")
+                    count("llm_first_chunk_ms", int((time.perf_counter() - started) * 1000))
+                on_text(chunk.text)
+        else:
+            response = get_model().generate_content(prompt, request_options=request_options)
+    count("llm_response_chars", len(response.text))
+    # Token counts as billed, when the backend reports them
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        count("llm_prompt_tokens", prompt_tokens)
+        count("llm_output_tokens", output_tokens)
+        if prompt_tokens or output_tokens:
+            scheduler.settle(reserved, prompt_tokens + output_tokens)
+    return response
+
+def normalize_risk(label):
+    """The RISK_LEVELS entry a model's risk label names, or None if it names none or several."""
+    if not isinstance(label, str):
+        return None
+    levels = {_RISK_WORDS[word] for word in re.split(r"[\s/,.:;*'\"()\-]+", label.lower()) if word in _RISK_WORDS}
+    return levels.pop() if len(levels) == 1 else None
+
+def _clean_result(item):
+    """item with its risk label normalized, or None if its risk, explanation or suggestion is unusable."""
+    if not isinstance(item, dict):
+        return None
+    risk = normalize_risk(item.get("risk"))
+    if risk is None:
+        return None
+    if not all(isinstance(item.get(key), str) and item[key].strip() for key in ("explanation", "suggestion")):
+        return None
+    return {**item, "risk": risk}
+
+def _read_analysis(stream):
+    """The analysis in a reply, repaired if need be, or None if it is unusable or was cut off."""
     try:
-        # Request content from Gemini
-        response = model.generate_content(prompt)
-        
-        # Clean the response text to ensure valid JSON parsing
-        # AI sometimes wraps JSON in markdown blocks (```json ... ```)
-        clean_text = response.text.replace('```json', '').replace('```', '').strip()
-        
-        # Parse and return the JSON data
-        analysis_result = json.loads(clean_text)
-        return analysis_result
+        parsed = stream.parse(dict)
+    except ValueError:
+        return None
+    result = _clean_result(parsed.value)
+    if result is None or parsed.truncated:
+        return None
+    if parsed.repaired:
+        count("json_repaired")
+    return result
+
+@timed("analyze_clause")
+def request_analysis(clause, language="English", timeout=None, on_partial=None):
+    """
+    Analyzes a contract clause using AI with a focus on Indian legal standards.
+    Supports both English and Hindi text.
+
+    With on_partial, the reply is streamed and on_partial(explanation) is
+    called from this thread with the explanation received so far. A reply
+    that cannot be read even after repair gets one short re-ask.
+
+    Raises on API errors or unusable responses; use analyze_clause() for a
+    call that never raises.
+    """
+    
+    prompt = PROMPT_TEMPLATE.format(clause=clause, language=language)
+    stream = ReplyStream()
+    on_text = None
+    if on_partial:
+        def on_text(chunk):
+            stream.feed(chunk)
+            explanation = stream.partial("explanation")
+            if explanation:
+                on_partial(explanation)
+    response = generate(prompt, timeout, on_text)
+    if not on_partial:
+        stream.feed(response.text)
+    analysis_result = _read_analysis(stream)
+    if analysis_result is None:
+        count("llm_reasks")
+        reply = " ".join(stream.text.split())[:REASK_REPLY_CHARS]
+        stream = ReplyStream()
+        stream.feed(generate(REASK_PROMPT_TEMPLATE.format(reply=reply, clause=clause, language=language),
+                             timeout).text)
+        analysis_result = _read_analysis(stream)
+        if analysis_result is None:
+            raise ValueError(f"Unexpected analysis result: {stream.text[:200]!r}")
+    return analysis_result
+
+@timed("analyze_batch")
+def request_batch_analysis(batch, language="English", timeout=None):
+    """
+    Analyzes several clauses in one request.
 
+    batch is a list of (clause_id, clause_text) pairs with integer ids. Returns
+    {clause_id: result} for the clauses that came back valid; the caller must
+    retry any missing ids on their own. Raises if the reply holds no JSON array,
+    even after repair.
+    """
+    clauses = "\n".join(f"[{clause_id}] {' '.join(text.split())}" for clause_id, text in batch)
+    prompt = BATCH_PROMPT_TEMPLATE.format(clauses=clauses, language=language)
+    # Skips bracketed ids like "[3]" quoted in prose before the array
+    parsed = parse_reply(generate(prompt, timeout).text, list,
+                         accept=lambda items: any(isinstance(item, dict) for item in items))
+    items = parsed.value
+    if parsed.repaired:
+        count("json_repaired")
+    if parsed.truncated:
+        # The reply was cut off inside its last object, which is left to a request of its own
+        items = items[:-1]
+
+    wanted = {clause_id for clause_id, _ in batch}
+    results = {}
+    for item in items:
+        item = _clean_result(item)
+        if item is None:
+            continue
+        try:
+            clause_id = int(item.pop("id"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if clause_id in wanted:
+            results[clause_id] = item
+    return results
+
+def failed_result(error):
+    """Result shown for a clause whose analysis failed, instead of a made-up risk."""
+    return {
+        "risk": FAILED,
+        "explanation": f"AI analysis failed ({type(error).__name__}: {error}). This clause has NOT been reviewed.",
+        "suggestion": "Review this clause manually for termination or liability traps, or re-run the audit.",
+        "error": str(error)
+    }
+
+def analyze_clause(clause, language="English"):
+    """Analyzes a single clause, returning a FAILED result instead of raising."""
+    try:
+        return request_analysis(clause, language)
     except Exception as e:
-        # Robust Fallback: If AI fails or API limit is reached, return a safe default
-        return {
-            "risk": "Medium",
-            "explanation": "AI Analysis encountered an error. Please review this clause manually for termination or liability traps.",
-            "suggestion": "Consult with a legal professional to ensure this clause complies with standard local regulations."
-        }
\ No newline at end of file
+        return failed_result(e)
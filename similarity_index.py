@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from risk_analyzer import MODEL_NAME
+from analysis_cache import prompt_fingerprint
+
+# Near-duplicate reuse: the same clause comes back with other party names,
+# dates, amounts or PDF whitespace, which defeats the exact-text cache. Clauses
+# are cut into word shingles, summarised as a MinHash signature and bucketed by
+# LSH bands, so a lookup reads a handful of buckets instead of the whole index.
+# The index is shared by every user of the server, so it keeps only hashes,
+# signatures and the analysis, never clause text, and is bounded like the
+# analysis cache.
+DEFAULT_INDEX_PATH = os.environ.get("CONTRACT_SIMILARITY_PATH",
+                                    os.path.join(".cache", "similarity_index.sqlite3"))
+# Jaccard similarity of the two clauses' shingle sets needed to reuse a result
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_AGE_DAYS = 180
+EVICT_EVERY_ADDS = 1000
+SHINGLE_WORDS = 3
+# 16 bands of 4 rows: a pair at 0.75 shares a bucket with probability above
+# 99.9%. Candidates are ranked by their full signature, which estimates the
+# similarity within about 0.05, and the best few are checked exactly.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_CANDIDATES = 16        # bucket matches ranked by bands shared
+ESTIMATE_SLACK = 0.15      # how far below the threshold an estimate may be and still be checked
+MAX_VERIFIED = 3           # candidates compared shingle by shingle
+MMAP_BYTES = 1 << 30
+# Bump when shingling, hashing or bucketing changes; older indexes start over
+INDEX_VERSION = 2
+# Too few shingles and one changed word swings the score; such clauses go to the AI
+MIN_SHINGLES = 4
+
+# Words that flip a clause's meaning while barely moving its similarity
+# ("shall" vs "shall not", "may" vs "must"). Clauses only match when these
+# occur in the same order, so such edits always go back to the AI.
+GUARD_WORDS = frozenset([
+    "not", "no", "never", "nor", "without", "except", "unless", "cannot",
+    "shall", "may", "must", "will",
+    "नहीं", "न", "बिना", "सिवाय", "सकता", "सकती", "सकते", "सकेगा", "सकेगी", "सकेंगे",
+])
+
+_WORD = re.compile(r"[^\s.,;:!?()\[\]{}\"'“”‘’|/\\\-–—।]+")
+_NUMBERS = re.compile(r"[0-9०-९]+")
+
+# Multiply-shift hash family, fixed so signatures stay valid across runs
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, 2 ** 64, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2 ** 64, NUM_PERM, dtype=np.uint64)
+# Mix the word hashes of each shingle, and the ROWS values of each band into a bucket key
+_SHINGLE_MIX = _rng.integers(1, 2 ** 64, SHINGLE_WORDS, dtype=np.uint64) | np.uint64(1)
+_BAND_MIX = _rng.integers(1, 2 ** 64, ROWS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALT = _rng.integers(0, 2 ** 64, BANDS, dtype=np.uint64)
+
+def words(text):
+    """The clause as lowercase words with punctuation dropped and every number masked out."""
+    return _WORD.findall(_NUMBERS.sub("0", text.lower()))
+
+def guard(word_list):
+    """The clause's GUARD_WORDS in order; only clauses with the same guard can match."""
+    return " ".join(w for w in word_list if w in GUARD_WORDS)
+
+def shingle_hashes(word_list):
+    """
+    Sorted distinct 32-bit hashes of the word n-grams of a words() list.
+    Each word is hashed once and every n-gram hash is mixed from its words'.
+    """
+    word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in word_list),
+                              dtype=np.uint64, count=len(word_list))
+    width = min(SHINGLE_WORDS, len(word_list))
+    count = len(word_list) - width + 1
+    with np.errstate(over="ignore"):
+        mixed = np.zeros(max(count, 0), dtype=np.uint64)
+        for offset in range(width):
+            mixed += word_hashes[offset:offset + count] * _SHINGLE_MIX[offset]
+    return np.unique((mixed >> np.uint64(32)).astype(np.uint32))
+
+def minhash(hashes):
+    """MinHash signature (NUM_PERM uint32 values) of a shingle_hashes() array."""
+    with np.errstate(over="ignore"):
+        values = (_A[:, None] * hashes.astype(np.uint64)[None, :] + _B[:, None]) >> np.uint64(32)
+    return values.min(axis=1).astype(np.uint32)
+
+@lru_cache(maxsize=1024)
+def _scope_salt(scope):
+    return np.uint64(int.from_bytes(hashlib.blake2b(scope.encode("utf-8"), digest_size=8).digest(), "little"))
+
+def band_keys(signature, scope):
+    """One signed 64-bit bucket key per LSH band; clauses in different scopes never share one."""
+    bands = signature.reshape(BANDS, ROWS).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        keys = ((bands * _BAND_MIX).sum(axis=1) + _BAND_SALT) ^ _scope_salt(scope)
+    return keys.view(np.int64).tolist()
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity: the share of MinHash values the signatures agree on."""
+    return float(np.count_nonzero(signature == other)) / NUM_PERM
+
+def jaccard(hashes, other):
+    """Exact Jaccard similarity of two shingle_hashes() arrays."""
+    shared = np.intersect1d(hashes, other, assume_unique=True).size
+    return shared / (hashes.size + other.size - shared)
+
+class SimilarityIndex:
+    """
+    On-disk (SQLite) MinHash/LSH index of analyzed clauses, shared by all
+    threads. Entries are tied to the model and prompts: when either changes
+    the index starts over, like stale entries in the analysis cache.
+    """
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS, model_name=MODEL_NAME):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.version = f"{model_name}/{prompt_fingerprint()}/{INDEX_VERSION}"
+        self.hits = 0
+        self.misses = 0
+        self._adds = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # Lookups touch a few random pages; map the file instead of copying pages in
+            self._conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                # Older versions may also have another table layout
+                self._conn.execute("DROP TABLE IF EXISTS buckets")
+                self._conn.execute("DROP TABLE IF EXISTS clauses")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS clauses (
+                    id INTEGER PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    shingles BLOB NOT NULL,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_clauses_last_used ON clauses (last_used)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key INTEGER NOT NULL,
+                    clause_id INTEGER NOT NULL,
+                    PRIMARY KEY (key, clause_id)
+                ) WITHOUT ROWID""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_clause ON buckets (clause_id)")
+        self.evict()
+
+    def _signature(self, clause, language):
+        """(shingle hashes, MinHash signature, LSH bucket keys) of a clause; the signature is None if it is too short."""
+        word_list = words(clause)
+        hashes = shingle_hashes(word_list)
+        if hashes.size < MIN_SHINGLES:
+            return hashes, None, None
+        signature = minhash(hashes)
+        return hashes, signature, band_keys(signature, f"{language}\x1f{guard(word_list)}")
+
+    def lookup(self, clause, language="English"):
+        """
+        Returns the analysis of the most similar indexed clause at or above the
+        threshold, marked source="similar" with the score, or None.
+        """
+        hashes, signature, keys = self._signature(clause, language)
+        if signature is None:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT clause_id FROM buckets WHERE key IN ({','.join('?' * BANDS)})", keys).fetchall()
+            scored = []
+            if rows:
+                candidates = [cid for cid, _ in Counter(cid for cid, in rows).most_common(MAX_CANDIDATES)]
+                for row in self._conn.execute(
+                        "SELECT id, signature, shingles, result FROM clauses "
+                        f"WHERE id IN ({','.join('?' * len(candidates))})", candidates):
+                    estimate = similarity(signature, np.frombuffer(row[1], dtype=np.uint32))
+                    if estimate >= self.threshold - ESTIMATE_SLACK:
+                        scored.append((estimate, row))
+            best, best_score = None, 0.0
+            for _, row in sorted(scored, key=lambda item: item[0], reverse=True)[:MAX_VERIFIED]:
+                score = jaccard(hashes, np.frombuffer(row[2], dtype=np.uint32))
+                if score > best_score:
+                    best, best_score = row, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE clauses SET last_used = ? WHERE id = ?", (time.time(), best[0]))
+        result = json.loads(best[3])
+        result.update(source="similar", similarity=round(best_score, 3))
+        return result
+
+    def add(self, clause, result, language="English"):
+        """Indexes a successful analysis (only the model's own fields are kept)."""
+        self.add_many([(clause, result)], language)
+
+    def add_many(self, items, language="English"):
+        """Indexes (clause, result) pairs in one transaction; clauses too short to compare are skipped."""
+        rows = []
+        for clause, result in items:
+            hashes, signature, keys = self._signature(clause, language)
+            if signature is not None:
+                stored = {k: result[k] for k in ("risk", "explanation", "suggestion") if k in result}
+                rows.append((signature, hashes, keys, json.dumps(stored, ensure_ascii=False)))
+        now = time.time()
+        with self._lock, self._conn:
+            for signature, hashes, keys, stored in rows:
+                cid = self._conn.execute(
+                    "INSERT INTO clauses (signature, shingles, result, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (signature.tobytes(), hashes.tobytes(), stored, now, now)).lastrowid
+                self._conn.executemany("INSERT OR IGNORE INTO buckets VALUES (?, ?)",
+                                       [(key, cid) for key in keys])
+            before = self._adds
+            self._adds += len(rows)
+        # Keep the file bounded in long-running processes, not just at startup
+        if self._adds // EVICT_EVERY_ADDS != before // EVICT_EVERY_ADDS:
+            self.evict()
+        return len(rows)
+
+    def evict(self):
+        """Applies the age limit, then trims least recently used entries over max_entries."""
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock, self._conn:
+            ids = self._conn.execute("""
+                SELECT id FROM clauses WHERE last_used < ?
+                UNION
+                SELECT id FROM (SELECT id FROM clauses ORDER BY last_used DESC LIMIT -1 OFFSET ?)
+                """, (cutoff, self.max_entries)).fetchall()
+            self._conn.executemany("DELETE FROM buckets WHERE clause_id = ?", ids)
+            self._conn.executemany("DELETE FROM clauses WHERE id = ?", ids)
+        return len(ids)
+
+    def clear(self):
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM clauses").rowcount
+            self._conn.execute("DELETE FROM buckets")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+def get_similarity_index():
+    """Process-wide index instance, so all Streamlit sessions share one connection."""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = SimilarityIndex()
+        return _shared_index
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Maintain the near-duplicate clause index.")
+    arg_parser.add_argument("--path", default=DEFAULT_INDEX_PATH)
+    arg_parser.add_argument("--clear", action="store_true", help="delete every indexed clause")
+    args = arg_parser.parse_args()
+
+    index = SimilarityIndex(args.path)
+    if args.clear:
+        print(f"Removed {index.clear()} entries")
+    print(index.stats())
@@ -1,14 +1,163 @@
-def generate_summary(full_text):
-    prompt = f"""
-    Summarize this contract in 5 bullet points. 
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from risk_analyzer import generate, MODEL_NAME
+from clause_splitter import split_clauses
+from analysis_cache import normalize_clause
+from analysis_engine import (call_with_retries, estimate_tokens, DEFAULT_WORKERS, DEFAULT_TIMEOUT,
+                             DEFAULT_RETRIES, DEFAULT_BACKOFF)
+from instrumentation import count, timed
+
+# Map-reduce summary of the whole contract: clause-aligned chunks are
+# summarized in parallel, then the partial summaries are merged FAN_IN at a
+# time until one call can write the final 5 points. Calls on the critical
+# path grow with log(length), and nothing past a fixed length is dropped.
+# Every clause goes in prefixed with its number, "[7(b)] ...", and every set
+# of notes with the clause range it covers, so citations survive each step.
+CHUNK_TOKENS = 3000
+FAN_IN = 4
+# Bump when a prompt changes, so cached partial summaries are not reused
+SUMMARY_PROMPT_VERSION = 2
+
+SUMMARY_PROMPT_TEMPLATE = """
+    Summarize this contract in 5 bullet points.
     Focus on:
     - Parties involved
     - Key obligations
     - Payment terms
     - Termination rights
     - Major risks
-    
-    Contract Text: {full_text[:10000]} # Limit text for API
+
+    The summary must be written in {language}.
+
+    Contract Text: {text}
     """
-    response = model.generate_content(prompt)
-    return response.text
\ No newline at end of file
+
+# One part of a longer contract: notes, not the final 5 points
+CHUNK_PROMPT_TEMPLATE = """
+    The following is one part of a longer contract. Each clause starts with its clause number
+    in brackets, e.g. [7(b)]. Write concise notes on this part only, citing those clause numbers. Cover:
+    - Parties involved
+    - Key obligations
+    - Payment terms
+    - Termination rights
+    - Major risks (liability, indemnity, penalties, one-sided terms)
+    Omit headings that this part does not touch. Write in {language}.
+
+    Contract Part: {text}
+    """
+
+# Merges notes of consecutive parts into notes of the same form
+REDUCE_PROMPT_TEMPLATE = """
+    The following are notes on consecutive parts of one contract, in order, each headed by the clauses it covers.
+    Merge them into one set of concise notes of the same form, keeping every termination right,
+    payment term and major risk with its clause number, and dropping repetition. Write in {language}.
+
+    Notes: {text}
+    """
+
+def summary_key(prompt_template, text, language):
+    """Cache key of one summarization step: the step, its normalized input, language, model and prompt version."""
+    payload = "\x1f".join(["summary", str(SUMMARY_PROMPT_VERSION), prompt_template, normalize_clause(text),
+                           language, MODEL_NAME])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _split_long(text, token_budget):
+    """Cuts a clause longer than the budget at line breaks, or at word breaks if a line is too long."""
+    limit = token_budget * 4
+    piece = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            if piece:
+                yield piece
+                piece = ""
+            yield line[:cut]
+            line = line[cut:]
+        if len(piece) + len(line) > limit:
+            yield piece
+            piece = ""
+        piece += line
+    if piece:
+        yield piece
+
+def chunk_clauses(clauses, token_budget=CHUNK_TOKENS, refs=None):
+    """
+    Packs consecutive clause texts into chunks of at most about token_budget
+    tokens, each piece prefixed with its clause number ("[7(b)] ...", refs
+    default to 1, 2, ...). Returns (text, first ref, last ref) per chunk.
+    """
+    chunks, current, used = [], [], 0
+    for ref, clause in zip(refs or range(1, len(clauses) + 1), clauses):
+        for piece in (_split_long(clause, token_budget) if estimate_tokens(clause) > token_budget else [clause]):
+            piece = f"[{ref}] {piece.strip()}"
+            tokens = estimate_tokens(piece)
+            if current and used + tokens > token_budget:
+                chunks.append(("\n".join(text for _, text in current), current[0][0], current[-1][0]))
+                current, used = [], 0
+            current.append((ref, piece))
+            used += tokens
+    if current:
+        chunks.append(("\n".join(text for _, text in current), current[0][0], current[-1][0]))
+    return chunks
+
+def _headed(notes):
+    """Joins (notes, first ref, last ref) under headings naming the clauses each covers."""
+    return "\n\n".join(f"Notes on clauses [{first}] to [{last}]:\n{text}" for text, first, last in notes)
+
+@timed("summarize")
+def _generate_text(prompt, timeout):
+    text = generate(prompt, timeout).text.strip()
+    if not text:
+        raise ValueError("Empty summary")
+    return text
+
+def summarize_clauses(clauses, language="English", workers=DEFAULT_WORKERS, cache=None,
+                      timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                      chunk_tokens=CHUNK_TOKENS, fan_in=FAN_IN, refs=None):
+    """
+    5-point executive summary of a contract given as its clause texts in
+    order, with their clause numbers in refs (1, 2, ... if not given).
+    With an AnalysisCache, every step's output is cached by its input, so a
+    re-run (or a revision sharing most chunks) only pays for what changed.
+    Raises if a step still fails after its retries.
+    """
+    def step(template, text):
+        key = summary_key(template, text, language)
+        cached = cache.get_text(key) if cache else None
+        if cached:
+            count("summary_cache_hits")
+            return cached
+        prompt = template.format(text=text, language=language)
+        summary = call_with_retries(lambda: _generate_text(prompt, timeout), retries, backoff)
+        if cache:
+            cache.put_text(key, summary)
+        return summary
+
+    kept = [(ref, clause) for ref, clause in zip(refs or range(1, len(clauses) + 1), clauses) if clause.strip()]
+    chunks = chunk_clauses([clause for _, clause in kept], chunk_tokens, [ref for ref, _ in kept])
+    if not chunks:
+        return ""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def run_all(template, texts):
+            # Copied contexts, so the spans count towards the current audit
+            futures = [pool.submit(contextvars.copy_context().run, step, template, text) for text in texts]
+            return [future.result() for future in futures]
+
+        if len(chunks) == 1:
+            return step(SUMMARY_PROMPT_TEMPLATE, chunks[0][0])
+        texts = run_all(CHUNK_PROMPT_TEMPLATE, [text for text, _, _ in chunks])
+        notes = [(text, first, last) for text, (_, first, last) in zip(texts, chunks)]
+        while len(notes) > fan_in:
+            groups = [notes[i:i + fan_in] for i in range(0, len(notes), fan_in)]
+            texts = run_all(REDUCE_PROMPT_TEMPLATE, [_headed(group) for group in groups])
+            notes = [(text, group[0][1], group[-1][2]) for text, group in zip(texts, groups)]
+        return step(SUMMARY_PROMPT_TEMPLATE, _headed(notes))
+
+def generate_summary(full_text, language="English", **options):
+    """5-point executive summary of a whole contract's text (see summarize_clauses)."""
+    clauses = split_clauses(full_text)
+    return summarize_clauses([clause.text for clause in clauses], language,
+                             refs=[clause.ref or i for i, clause in enumerate(clauses, start=1)], **options)